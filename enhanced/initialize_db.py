@@ -31,10 +31,17 @@ def initialize_database(db_path):
             timestamp TEXT NOT NULL,
             metric_name TEXT NOT NULL,
             metric_value REAL NOT NULL,
+            ts_epoch INTEGER,
             UNIQUE(timestamp, metric_name)
         )
         ''')
         
+        # Databases created before ts_epoch existed need the column added and backfilled
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(metrics)')}
+        if 'ts_epoch' not in columns:
+            cursor.execute('ALTER TABLE metrics ADD COLUMN ts_epoch INTEGER')
+            cursor.execute("UPDATE metrics SET ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)")
+        
         # Create events table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS events (
@@ -85,22 +92,24 @@ def initialize_database(db_path):
         ''')
         
         # Create indexes for faster queries
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(metric_name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_epoch ON metrics(ts_epoch)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_name_epoch ON metrics(metric_name, ts_epoch)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_state_timestamp ON state_history(timestamp)')
         
         # Insert initial sample data
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
+        ts_epoch = int(now.timestamp())
         
         # Sample metrics
-        cursor.execute('INSERT OR IGNORE INTO metrics (timestamp, metric_name, metric_value) VALUES (?, ?, ?)',
-                      (timestamp, 'cpu_load', 0.45))
-        cursor.execute('INSERT OR IGNORE INTO metrics (timestamp, metric_name, metric_value) VALUES (?, ?, ?)',
-                      (timestamp, 'memory_used_percent', 62.7))
-        cursor.execute('INSERT OR IGNORE INTO metrics (timestamp, metric_name, metric_value) VALUES (?, ?, ?)',
-                      (timestamp, 'disk_usage_root', 72.3))
+        cursor.execute('INSERT OR IGNORE INTO metrics (timestamp, ts_epoch, metric_name, metric_value) VALUES (?, ?, ?, ?)',
+                      (timestamp, ts_epoch, 'cpu_load', 0.45))
+        cursor.execute('INSERT OR IGNORE INTO metrics (timestamp, ts_epoch, metric_name, metric_value) VALUES (?, ?, ?, ?)',
+                      (timestamp, ts_epoch, 'memory_used_percent', 62.7))
+        cursor.execute('INSERT OR IGNORE INTO metrics (timestamp, ts_epoch, metric_name, metric_value) VALUES (?, ?, ?, ?)',
+                      (timestamp, ts_epoch, 'disk_usage_root', 72.3))
         
         # Sample event
         cursor.execute('''
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 import sqlite3
 import shutil
 import importlib.util
+import compileall
 import subprocess
 from typing import Dict, List, Any, Optional, Tuple, Union
 
@@ -32,8 +33,18 @@ except ImportError:
     LOG_DIR = DEFAULT_LOG_DIR
     INSTALL_DIR = DEFAULT_INSTALL_DIR
 
+# Directories already created by this process
+_ENSURED_DIRS = set()
+
+def _ensure_dir(path: str) -> None:
+    """Create a directory (and parents) once per process"""
+    if path in _ENSURED_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    _ENSURED_DIRS.add(path)
+
 # Setup logging
-os.makedirs(LOG_DIR, exist_ok=True)
+_ensure_dir(LOG_DIR)
 logging.basicConfig(
     filename=os.path.join(LOG_DIR, "integration.log"),
     level=logging.INFO,
@@ -41,9 +52,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Integration")
 
+__all__ = ["DeusExMachina", "main"]
+
+def _backup_file(path: str, backup_path: str) -> None:
+    """Back up a file, hardlinking it when possible instead of copying"""
+    if os.path.lexists(backup_path):
+        os.remove(backup_path)
+    try:
+        os.link(path, backup_path)
+    except (OSError, NotImplementedError):
+        # Fall back to a real copy (e.g. across filesystems)
+        shutil.copy2(path, backup_path)
+
+def _replace_file(path: str, content: str) -> None:
+    """Replace a file with new content without modifying its old inode.
+    
+    The new content is written to a temporary file which is renamed over
+    the original, so hardlinked backups keep the previous content.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    if os.path.exists(path):
+        shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+def _load_module(name: str, path: str):
+    """Load a module from a file path, reusing it if already imported.
+    
+    The module is registered in sys.modules so repeated setups in the same
+    process do not execute it again; the file loader itself takes care of
+    the __pycache__ bytecode.
+    """
+    path = os.path.abspath(path)
+    module = sys.modules.get(name)
+    if module is not None and getattr(module, "__file__", None) == path:
+        return module
+        
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(name, None)
+        raise
+    return module
+
 class DeusExMachina:
     """Main controller class for the enhanced system"""
     
+    # Fixed attribute layout: no per-instance __dict__ on the monitor path
+    __slots__ = ("install_dir", "log_dir", "db_dir", "components", "initialized")
+    
     def __init__(self, install_dir: str = INSTALL_DIR, log_dir: str = LOG_DIR):
         """Initialize the controller"""
         self.install_dir = install_dir
@@ -53,8 +114,8 @@ class DeusExMachina:
         self.initialized = False
         
         # Create required directories
-        os.makedirs(self.log_dir, exist_ok=True)
-        os.makedirs(self.db_dir, exist_ok=True)
+        _ensure_dir(self.log_dir)
+        _ensure_dir(self.db_dir)
         
         logger.info(f"Initialized DeusExMachina controller (install: {install_dir}, logs: {log_dir})")
         
@@ -90,7 +151,7 @@ class DeusExMachina:
     def _setup_memory_module(self) -> None:
         """Set up the memory database module"""
         memory_path = os.path.join(self.install_dir, "core/memory/memory.py")
-        os.makedirs(os.path.dirname(memory_path), exist_ok=True)
+        _ensure_dir(os.path.dirname(memory_path))
         
         # Check if we need to install the memory module
         if not os.path.exists(memory_path):
@@ -104,9 +165,7 @@ class DeusExMachina:
         
         # Load the memory module
         try:
-            spec = importlib.util.spec_from_file_location("memory", memory_path)
-            memory_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(memory_module)
+            memory_module = _load_module("memory", memory_path)
             
             # Initialize the memory component
             self.components["memory"] = memory_module.DeusMemory()
@@ -119,7 +178,7 @@ class DeusExMachina:
     def _setup_action_engine(self) -> None:
         """Set up the action engine module"""
         action_path = os.path.join(self.install_dir, "core/action_engine/action_engine.py")
-        os.makedirs(os.path.dirname(action_path), exist_ok=True)
+        _ensure_dir(os.path.dirname(action_path))
         
         # Check if we need to install the action engine
         if not os.path.exists(action_path):
@@ -133,9 +192,7 @@ class DeusExMachina:
         
         # Load the action engine module
         try:
-            spec = importlib.util.spec_from_file_location("action_engine", action_path)
-            action_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(action_module)
+            action_module = _load_module("action_engine", action_path)
             
             # Initialize the action engine component
             self.components["action_engine"] = action_module.ActionEngine()
@@ -154,7 +211,7 @@ class DeusExMachina:
             # Backup the existing AI brain
             backup_path = f"{brain_path}.bak"
             try:
-                shutil.copy(brain_path, backup_path)
+                _backup_file(brain_path, backup_path)
                 logger.info(f"Backed up original AI brain to {backup_path}")
             except Exception as e:
                 logger.error(f"Failed to backup AI brain: {str(e)}")
@@ -164,14 +221,15 @@ class DeusExMachina:
         source_path = os.path.join(self.install_dir, "enhanced/ai_brain_updated.py")
         if os.path.exists(source_path):
             try:
-                shutil.copy(source_path, brain_path)
+                with open(source_path, 'r') as f:
+                    _replace_file(brain_path, f.read())
                 logger.info(f"Installed enhanced AI brain to {brain_path}")
             except Exception as e:
                 logger.error(f"Failed to install enhanced AI brain: {str(e)}")
         else:
             logger.error(f"Enhanced AI brain source not found: {source_path}")
             
-    def collect_metrics(self) -> Dict[str, Any]:
+    def collect_metrics(self, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """Collect current system metrics and store them"""
         if not self.initialized:
             logger.error("System not initialized, cannot collect metrics")
@@ -186,20 +244,23 @@ class DeusExMachina:
         # Store current metrics
         result = memory.store_current_metrics()
         
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+            
         if result:
             return {
                 "success": True,
                 "message": "Metrics collected and stored successfully",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
         else:
             return {
                 "success": False,
                 "error": "Failed to collect or store metrics",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
             
-    def analyze_system(self) -> Dict[str, Any]:
+    def analyze_system(self, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """Perform system analysis and return results"""
         if not self.initialized:
             logger.error("System not initialized, cannot analyze")
@@ -211,32 +272,40 @@ class DeusExMachina:
             logger.error("Memory component not available")
             return {"success": False, "error": "Memory component not available"}
             
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+            
         # Get system summary
         try:
             summary = memory.get_system_summary(days=7)
             
+            # Collect the names of all metrics with detected anomalies in a
+            # single pass, so callers can use plain membership tests
+            anomalies = summary.get("anomalies") or {}
+            anomalous = frozenset(
+                metric for metric, info in anomalies.items()
+                if info and info.get("anomalies_detected", False)
+            )
+            
             # Check for anomalies
-            has_anomalies = False
             critical_metrics = ["cpu_load", "memory_free_mb", "disk_usage_root"]
-            
-            for metric in critical_metrics:
-                if metric in summary.get("anomalies", {}) and summary["anomalies"][metric].get("anomalies_detected", False):
-                    has_anomalies = True
+            has_anomalies = not anomalous.isdisjoint(critical_metrics)
                     
             return {
                 "success": True,
                 "message": "System analysis completed",
                 "has_anomalies": has_anomalies,
+                "anomalous_metrics": sorted(anomalous),
                 "overall_health": summary.get("overall_health", 0),
                 "summary": summary,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
         except Exception as e:
             logger.error(f"System analysis failed: {str(e)}")
             return {
                 "success": False,
                 "error": f"System analysis failed: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
             
     def execute_remediation(self, issue_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -291,36 +360,38 @@ class DeusExMachina:
         
     def run_integration_cycle(self) -> Dict[str, Any]:
         """Run a complete integration cycle"""
+        # Use a single timestamp for the whole cycle
+        timestamp = datetime.now().isoformat()
         results = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "steps": {}
         }
         
         # Step 1: Collect metrics
-        results["steps"]["collect_metrics"] = self.collect_metrics()
+        results["steps"]["collect_metrics"] = self.collect_metrics(timestamp)
         
         # Step 2: Analyze system
-        analysis = self.analyze_system()
+        analysis = self.analyze_system(timestamp)
         results["steps"]["analyze_system"] = analysis
         
         # Step 3: Execute remediations if needed
         if analysis.get("success", False) and analysis.get("has_anomalies", False):
-            # Get anomalies from the analysis
-            anomalies = analysis.get("summary", {}).get("anomalies", {})
+            # Get anomalous metric names from the analysis
+            anomalous_metrics = frozenset(analysis.get("anomalous_metrics", ()))
             remediation_results = []
             
             # Check for CPU issues
-            if "cpu_load" in anomalies and anomalies["cpu_load"].get("anomalies_detected", False):
+            if "cpu_load" in anomalous_metrics:
                 cpu_result = self.execute_remediation("high_cpu")
                 remediation_results.append({"issue": "high_cpu", "result": cpu_result})
                 
             # Check for memory issues
-            if "memory_free_mb" in anomalies and anomalies["memory_free_mb"].get("anomalies_detected", False):
+            if "memory_free_mb" in anomalous_metrics:
                 memory_result = self.execute_remediation("low_memory")
                 remediation_results.append({"issue": "low_memory", "result": memory_result})
                 
             # Check for disk issues
-            if "disk_usage_root" in anomalies and anomalies["disk_usage_root"].get("anomalies_detected", False):
+            if "disk_usage_root" in anomalous_metrics:
                 disk_result = self.execute_remediation("disk_space")
                 remediation_results.append({"issue": "disk_space", "result": disk_result})
                 
@@ -351,6 +422,21 @@ class DeusExMachina:
         except Exception as e:
             logger.error(f"Monitoring stopped due to error: {str(e)}")
             
+    def compile_components(self) -> Dict[str, bool]:
+        """Precompile the dynamically loaded component modules to bytecode"""
+        module_paths = [
+            os.path.join(self.install_dir, "core/memory/memory.py"),
+            os.path.join(self.install_dir, "core/action_engine/action_engine.py"),
+            os.path.join(self.install_dir, "core/vigilance/ai_brain.py")
+        ]
+        
+        results = {}
+        for path in module_paths:
+            if os.path.exists(path):
+                results[path] = bool(compileall.compile_file(path, quiet=1))
+                
+        return results
+        
     def enhance_bash_scripts(self) -> Dict[str, Any]:
         """Enhance the bash scripts to integrate with the new components"""
         results = {}
@@ -359,11 +445,13 @@ class DeusExMachina:
         breath_script = os.path.join(self.install_dir, "core/breath/breath.sh")
         if os.path.exists(breath_script):
             backup_path = f"{breath_script}.bak"
-            shutil.copy(breath_script, backup_path)
+            _backup_file(breath_script, backup_path)
             
             # Add a line to call our memory module at the end
+            # (-s skips the per-user site directory scan on every startup;
+            # -S is not an option since memory.py needs numpy from site-packages)
             integration_line = '\n# Call memory module after completing checks\n'
-            integration_line += 'python3 "$PROJECT_ROOT/core/memory/memory.py"\n'
+            integration_line += 'python3 -s "$PROJECT_ROOT/core/memory/memory.py"\n'
             
             with open(breath_script, 'r') as f:
                 content = f.read()
@@ -373,8 +461,7 @@ class DeusExMachina:
                 # Insert just before the "main" call at the end
                 modified_content = content.replace("# Run main function\nmain", integration_line + "# Run main function\nmain")
                 
-                with open(breath_script, 'w') as f:
-                    f.write(modified_content)
+                _replace_file(breath_script, modified_content)
                     
                 results["breath_script"] = {
                     "modified": True,
@@ -431,7 +518,8 @@ def main():
         success = deus.setup()
         if success:
             results = deus.analyze_system()
-            print(json.dumps(results, indent=2))
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write("\n")
         else:
             print("Setup failed, cannot analyze")
             sys.exit(1)
@@ -447,9 +535,13 @@ def main():
     elif args.command == "install":
         success = deus.setup()
         if success:
+            # Precompile component modules so later cold starts load bytecode
+            deus.compile_components()
+            
             # Enhance bash scripts
             results = deus.enhance_bash_scripts()
-            print(json.dumps(results, indent=2))
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write("\n")
         else:
             print("Setup failed, cannot install components")
             sys.exit(1)
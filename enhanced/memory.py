@@ -3,13 +3,18 @@
 # Implements persistent memory and trend analysis
 
 import os
+import re
 import sys
 import json
 import sqlite3
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -27,6 +32,24 @@ DB_DIR = os.path.join(LOG_DIR, "database")
 DB_PATH = os.path.join(DB_DIR, "deus_memory.db")
 MAX_DB_SIZE_MB = 100  # Maximum database size in MB
 RETENTION_DAYS = 30   # Default retention period for metrics
+CLEANUP_BATCH_SIZE = 1000  # Rows deleted per transaction during cleanup
+FETCH_BATCH_SIZE = 1000    # Rows fetched per round trip in history reads
+
+# Metrics checked for anomalies on every monitoring cycle
+CRITICAL_METRICS = ('cpu_load', 'memory_free_mb', 'disk_usage_root', 'open_ports')
+
+# Unsigned decimal strings as written by heartbeat.sh (e.g. "0.52", "87")
+_NUMERIC_RE = re.compile(r'(?:\d+\.?\d*|\.\d+)', re.ASCII)
+
+# SQL for the hot statements, kept as shared constants so the connection's
+# statement cache reuses the compiled statements across calls
+_INSERT_METRIC_SQL = (
+    'INSERT INTO metrics (timestamp, ts_epoch, metric_name, metric_value) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT(timestamp, metric_name) DO UPDATE SET metric_value = excluded.metric_value'
+)
+_INSERT_EVENT_SQL = 'INSERT INTO events (timestamp, event_type, severity, description, details) VALUES (?, ?, ?, ?, ?)'
+_INSERT_STATE_SQL = 'INSERT INTO state_history (timestamp, old_state, new_state, reason) VALUES (?, ?, ?, ?)'
+_SELECT_HISTORY_SQL = 'SELECT timestamp, metric_value FROM metrics WHERE metric_name = ? AND ts_epoch >= ? ORDER BY ts_epoch'
 
 # Set up logging
 logging.basicConfig(
@@ -39,13 +62,49 @@ logger = logging.getLogger("Memory")
 # Create directories if they don't exist
 os.makedirs(DB_DIR, exist_ok=True)
 
+# Connections kept open for the life of each thread, keyed by database path,
+# so repeated DeusMemory instances skip reconnecting and re-warming the cache
+_connection_pool = threading.local()
+
+def _iter_rows(cursor: sqlite3.Cursor) -> Iterator[Any]:
+    """Stream a cursor's rows in FETCH_BATCH_SIZE chunks instead of fetchall()"""
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+def _rows_to_arrays(rows: Iterable[Any], offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Split (timestamp, value) columns starting at offset into arrays.
+    
+    The buffers grow geometrically, so rows can be consumed as they stream
+    from the cursor without materializing them in a list first.
+    """
+    capacity = 256
+    timestamps = np.empty(capacity, dtype=object)
+    values = np.empty(capacity, dtype=np.float64)
+    count = 0
+    for row in rows:
+        if count == capacity:
+            capacity *= 2
+            timestamps = np.concatenate((timestamps, np.empty(count, dtype=object)))
+            values = np.concatenate((values, np.empty(count, dtype=np.float64)))
+        timestamps[count] = row[offset]
+        values[count] = row[offset + 1]
+        count += 1
+    return timestamps[:count], values[:count]
+
 class DeusMemory:
     """Main class for metrics storage and analysis"""
     
-    def __init__(self, db_path: str = DB_PATH):
-        """Initialize the memory system"""
+    def __init__(self, db_path: str = DB_PATH, short_lived: bool = False):
+        """Initialize the memory system.
+        
+        Connections are shared per thread and kept open until the process
+        exits; pass short_lived=True to close it when the context exits.
+        """
         self.db_path = db_path
-        self.conn = None
+        self.short_lived = short_lived
         self.initialize_database()
         
     def __enter__(self):
@@ -54,19 +113,87 @@ class DeusMemory:
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
-        if self.conn:
-            self.conn.close()
+        conn = self.conn
+        if conn is None:
+            return
+        if self.short_lived:
+            self._pooled_connections().pop(self.db_path, None)
+            _connection_pool.mirror_days.pop(self.db_path, None)
+            _connection_pool.known_metrics.pop(self.db_path, None)
+            conn.close()
+        else:
+            conn.commit()
             
+    @staticmethod
+    def _pooled_connections() -> Dict[str, sqlite3.Connection]:
+        """Get this thread's connection pool, discarding it after a fork"""
+        pid = os.getpid()
+        if getattr(_connection_pool, 'pid', None) != pid:
+            _connection_pool.pid = pid
+            _connection_pool.connections = {}
+            # Days of metrics currently mirrored into each connection's mem schema
+            _connection_pool.mirror_days = {}
+            # Known metric names per database, loaded on first summary
+            _connection_pool.known_metrics = {}
+        return _connection_pool.connections
+        
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """The pooled connection for this thread, if one is open"""
+        return self._pooled_connections().get(self.db_path)
+        
     def get_connection(self) -> sqlite3.Connection:
         """Get a database connection with proper error handling"""
-        if self.conn is None:
+        connections = self._pooled_connections()
+        conn = connections.get(self.db_path)
+        if conn is None:
             try:
-                self.conn = sqlite3.connect(self.db_path)
-                self.conn.row_factory = sqlite3.Row
+                conn = sqlite3.connect(self.db_path, cached_statements=256)
+                conn.row_factory = sqlite3.Row
+                self._configure_connection(conn)
             except sqlite3.Error as e:
                 logger.error(f"Database connection error: {str(e)}")
                 raise
-        return self.conn
+            connections[self.db_path] = conn
+        return conn
+        
+    def _configure_connection(self, conn: sqlite3.Connection) -> None:
+        """Apply performance pragmas to a freshly opened connection"""
+        # Match the OS page size; only takes effect on a brand new database,
+        # so it must run before journal_mode writes the header
+        conn.execute('PRAGMA page_size=4096')
+        
+        # Reclaim free pages incrementally instead of rewriting the whole
+        # file; applies to new databases or on the next full VACUUM
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        
+        # WAL lets readers and the writer proceed concurrently and, with
+        # synchronous=NORMAL, avoids an fsync on every commit
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache
+        conn.execute('PRAGMA busy_timeout=5000')
+        
+        # Freed pages don't need to be zero-filled on delete
+        conn.execute('PRAGMA secure_delete=OFF')
+        
+        # Serve reads straight from the kernel page cache; the window is
+        # larger than MAX_DB_SIZE_MB so the whole database is mapped
+        conn.execute('PRAGMA mmap_size=268435456')
+        
+        # In-memory mirror of the recent metrics window used by the summary
+        conn.execute("ATTACH DATABASE ':memory:' AS mem")
+        conn.execute('''
+        CREATE TABLE mem.metrics (
+            timestamp TEXT NOT NULL,
+            ts_epoch INTEGER,
+            metric_name TEXT NOT NULL,
+            metric_value REAL NOT NULL,
+            UNIQUE(timestamp, metric_name)
+        )
+        ''')
+        conn.execute('CREATE INDEX mem.idx_metrics_name_epoch ON metrics(metric_name, ts_epoch)')
         
     def initialize_database(self) -> None:
         """Create database tables if they don't exist"""
@@ -81,10 +208,18 @@ class DeusMemory:
                 timestamp TEXT NOT NULL,
                 metric_name TEXT NOT NULL,
                 metric_value REAL NOT NULL,
+                ts_epoch INTEGER,
                 UNIQUE(timestamp, metric_name)
             )
             ''')
             
+            # Add the epoch column to databases created before it existed;
+            # timestamps are naive local time, like datetime.timestamp() assumes
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(metrics)')}
+            if 'ts_epoch' not in columns:
+                cursor.execute('ALTER TABLE metrics ADD COLUMN ts_epoch INTEGER')
+                cursor.execute("UPDATE metrics SET ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)")
+            
             # Create events table
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS events (
@@ -109,8 +244,16 @@ class DeusMemory:
             ''')
             
             # Create indexes for faster queries
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(metric_name)')
+            # Range scans compare integer epochs rather than ISO strings; the
+            # composite index serves "metric_name = ? AND ts_epoch >= ? ORDER BY ts_epoch"
+            # directly and also covers plain metric_name lookups
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_epoch ON metrics(ts_epoch)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_name_epoch ON metrics(metric_name, ts_epoch)')
+            # Superseded by the epoch indexes (timestamp lookups are still
+            # covered by the UNIQUE(timestamp, metric_name) index)
+            cursor.execute('DROP INDEX IF EXISTS idx_metrics_timestamp')
+            cursor.execute('DROP INDEX IF EXISTS idx_metrics_name')
+            cursor.execute('DROP INDEX IF EXISTS idx_metrics_name_ts')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_state_timestamp ON state_history(timestamp)')
@@ -139,42 +282,37 @@ class DeusMemory:
             # Convert to ISO format for consistency
             try:
                 dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                timestamp_iso = dt.isoformat()
             except ValueError:
-                timestamp_iso = datetime.now().isoformat()
+                dt = datetime.now()
+            timestamp_iso = dt.isoformat()
+            ts_epoch = int(dt.timestamp())
                 
-            # Store each metric separately
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
+            # Collect one row per numeric metric
+            rows = []
             for key, value in metrics.items():
                 if key == 'timestamp':
                     continue
                     
-                # Convert string values to numeric if possible
+                # Convert numeric strings, skip any other non-numeric values
                 if isinstance(value, str):
-                    try:
-                        if value.replace('.', '', 1).isdigit():
-                            value = float(value)
-                        elif value.isdigit():
-                            value = int(value)
-                    except ValueError:
-                        pass
-                        
-                # Skip non-numeric values
-                if not isinstance(value, (int, float)):
+                    if not _NUMERIC_RE.fullmatch(value):
+                        continue
+                    value = float(value)
+                elif isinstance(value, bool) or not isinstance(value, (int, float)):
                     continue
                     
-                try:
-                    cursor.execute(
-                        'INSERT OR REPLACE INTO metrics (timestamp, metric_name, metric_value) VALUES (?, ?, ?)',
-                        (timestamp_iso, key, value)
-                    )
-                except sqlite3.Error as e:
-                    logger.error(f"Error storing metric {key}: {str(e)}")
-                    
-            conn.commit()
-            logger.info(f"Stored {len(metrics) - 1} metrics from heartbeat")
+                rows.append((timestamp_iso, ts_epoch, key, value))
+                
+            # Store all metrics in a single transaction
+            conn = self.get_connection()
+            with conn:
+                conn.executemany(_INSERT_METRIC_SQL, rows)
+                
+            known_metrics = _connection_pool.known_metrics.get(self.db_path)
+            if known_metrics is not None:
+                known_metrics.update(row[2] for row in rows)
+                
+            logger.info(f"Stored {len(rows)} metrics from heartbeat")
             return True
         except Exception as e:
             logger.error(f"Error storing metrics: {str(e)}")
@@ -190,7 +328,7 @@ class DeusMemory:
             details_json = json.dumps(details) if details else None
             
             cursor.execute(
-                'INSERT INTO events (timestamp, event_type, severity, description, details) VALUES (?, ?, ?, ?, ?)',
+                _INSERT_EVENT_SQL,
                 (timestamp, event_type, severity, description, details_json)
             )
             
@@ -210,7 +348,7 @@ class DeusMemory:
             timestamp = datetime.now().isoformat()
             
             cursor.execute(
-                'INSERT INTO state_history (timestamp, old_state, new_state, reason) VALUES (?, ?, ?, ?)',
+                _INSERT_STATE_SQL,
                 (timestamp, old_state, new_state, reason)
             )
             
@@ -227,23 +365,69 @@ class DeusMemory:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            start_date = (datetime.now() - timedelta(days=days)).isoformat()
+            start_epoch = time.time() - days * 86400
             
-            cursor.execute(
-                'SELECT timestamp, metric_value FROM metrics WHERE metric_name = ? AND timestamp >= ? ORDER BY timestamp',
-                (metric_name, start_date)
-            )
+            cursor.execute(_SELECT_HISTORY_SQL, (metric_name, start_epoch))
             
-            return [(row['timestamp'], row['metric_value']) for row in cursor.fetchall()]
+            return [(row['timestamp'], row['metric_value']) for row in _iter_rows(cursor)]
         except Exception as e:
             logger.error(f"Error fetching metric history: {str(e)}")
             return []
             
+    def get_metric_history_np(self, metric_name: str, days: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+        """Get historical values for a specific metric as (timestamps, values) arrays"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            start_epoch = time.time() - days * 86400
+            
+            cursor.execute(_SELECT_HISTORY_SQL, (metric_name, start_epoch))
+            
+            # Fill preallocated buffers instead of building intermediate lists
+            return _rows_to_arrays(_iter_rows(cursor))
+        except Exception as e:
+            logger.error(f"Error fetching metric history: {str(e)}")
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float64)
+            
+    def get_metric_histories_np(self, days: int = 7,
+                                metric_names: Optional[Sequence[str]] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Get (timestamps, values) arrays for several metrics with a single query"""
+        return self._query_histories('main.metrics', days, metric_names)
+        
+    def _query_histories(self, table: str, days: int,
+                         metric_names: Optional[Sequence[str]] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Read per-metric (timestamps, values) arrays from table (main or mirror)"""
+        conn = self.get_connection()
+        start_epoch = time.time() - days * 86400
+        
+        if metric_names is None:
+            cursor = conn.execute(
+                f'SELECT metric_name, timestamp, metric_value FROM {table} WHERE ts_epoch >= ? ORDER BY metric_name, ts_epoch',
+                (start_epoch,)
+            )
+        else:
+            placeholders = ', '.join('?' * len(metric_names))
+            cursor = conn.execute(
+                f'SELECT metric_name, timestamp, metric_value FROM {table} WHERE metric_name IN ({placeholders}) '
+                'AND ts_epoch >= ? ORDER BY metric_name, ts_epoch',
+                (*metric_names, start_epoch)
+            )
+            
+        # Rows arrive grouped by metric, so split them in one pass
+        return {
+            metric: _rows_to_arrays(rows, offset=1)
+            for metric, rows in groupby(_iter_rows(cursor), key=itemgetter(0))
+        }
+        
     def calculate_metric_trends(self, metric_name: str, days: int = 7) -> Dict[str, Any]:
         """Calculate trends for a specific metric"""
-        values = self.get_metric_history(metric_name, days)
+        timestamps, data_points = self.get_metric_history_np(metric_name, days)
+        return self._compute_trends(metric_name, data_points)
         
-        if not values:
+    def _compute_trends(self, metric_name: str, data_points: np.ndarray) -> Dict[str, Any]:
+        """Calculate trend statistics over an array of metric values"""
+        if not data_points.size:
             return {
                 'metric': metric_name,
                 'available': False,
@@ -251,21 +435,18 @@ class DeusMemory:
             }
             
         try:
-            # Extract values
-            timestamps = [t for t, _ in values]
-            data_points = [v for _, v in values]
+            count = data_points.size
+            current = data_points[-1].item()
             
             # Basic statistics
-            if len(data_points) >= 2:
-                mean = sum(data_points) / len(data_points)
-                variance = sum((x - mean) ** 2 for x in data_points) / len(data_points)
-                std_dev = variance ** 0.5
+            if count >= 2:
+                mean = data_points.mean().item()
+                std_dev = data_points.std().item()
                 
                 # Trend direction
-                first_half = data_points[:len(data_points)//2]
-                second_half = data_points[len(data_points)//2:]
-                first_half_avg = sum(first_half) / len(first_half) if first_half else 0
-                second_half_avg = sum(second_half) / len(second_half) if second_half else 0
+                half = count // 2
+                first_half_avg = data_points[:half].mean().item() if half else 0
+                second_half_avg = data_points[half:].mean().item()
                 
                 trend_direction = "stable"
                 if second_half_avg > first_half_avg * 1.1:
@@ -274,24 +455,16 @@ class DeusMemory:
                     trend_direction = "decreasing"
                 
                 # Rate of change
-                if len(data_points) >= 3:
+                if count >= 3:
                     try:
-                        # Simple linear regression
-                        x = list(range(len(data_points)))
-                        y = data_points
-                        
-                        # Calculate slope (m) for y = mx + b
-                        n = len(x)
-                        sum_x = sum(x)
-                        sum_y = sum(y)
-                        sum_xy = sum(xi * yi for xi, yi in zip(x, y))
-                        sum_xx = sum(xi * xi for xi in x)
-                        
-                        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
+                        # Simple linear regression (slope m for y = mx + b)
+                        x = np.arange(count, dtype=np.float64)
+                        x -= x.mean()
+                        slope = (np.dot(x, data_points - mean) / np.dot(x, x)).item()
                         
                         # Normalize slope to percentage change per day
                         normalized_slope = slope * 24 / mean if mean != 0 else 0
-                    except:
+                    except Exception:
                         slope = 0
                         normalized_slope = 0
                 else:
@@ -301,10 +474,10 @@ class DeusMemory:
                 return {
                     'metric': metric_name,
                     'available': True,
-                    'count': len(data_points),
-                    'current': data_points[-1],
-                    'min': min(data_points),
-                    'max': max(data_points),
+                    'count': count,
+                    'current': current,
+                    'min': data_points.min().item(),
+                    'max': data_points.max().item(),
                     'mean': mean,
                     'std_dev': std_dev,
                     'trend': trend_direction,
@@ -315,8 +488,8 @@ class DeusMemory:
                 return {
                     'metric': metric_name,
                     'available': True,
-                    'count': len(data_points),
-                    'current': data_points[-1],
+                    'count': count,
+                    'current': current,
                     'trend': 'insufficient_data'
                 }
         except Exception as e:
@@ -356,62 +529,99 @@ class DeusMemory:
         """Remove data older than retention_days"""
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
             
             cutoff_date = (datetime.now() - timedelta(days=retention_days)).isoformat()
+            cutoff_epoch = time.time() - retention_days * 86400
             
-            # Delete old metrics
-            cursor.execute('DELETE FROM metrics WHERE timestamp < ?', (cutoff_date,))
-            metrics_deleted = cursor.rowcount
-            
-            # Delete old events
-            cursor.execute('DELETE FROM events WHERE timestamp < ?', (cutoff_date,))
-            events_deleted = cursor.rowcount
+            # Delete old metrics, events and state history
+            metrics_deleted = self._delete_older_than(conn, 'metrics', 'ts_epoch', cutoff_epoch)
+            events_deleted = self._delete_older_than(conn, 'events', 'timestamp', cutoff_date)
+            states_deleted = self._delete_older_than(conn, 'state_history', 'timestamp', cutoff_date)
             
-            # Delete old state history
-            cursor.execute('DELETE FROM state_history WHERE timestamp < ?', (cutoff_date,))
-            states_deleted = cursor.rowcount
+            # Reload the summary mirror and metric names from the trimmed
+            # tables next time
+            _connection_pool.mirror_days.pop(self.db_path, None)
+            _connection_pool.known_metrics.pop(self.db_path, None)
             
-            # Vacuum database to reclaim space
-            cursor.execute('VACUUM')
+            # Reclaim space from the deleted rows
+            self._reclaim_free_pages(conn)
             
-            conn.commit()
             logger.info(f"Cleaned up database: removed {metrics_deleted} metrics, {events_deleted} events, {states_deleted} state records")
             return True
         except Exception as e:
             logger.error(f"Error cleaning up database: {str(e)}")
             return False
             
+    def _delete_older_than(self, conn: sqlite3.Connection, table: str, column: str,
+                           cutoff: Union[str, float]) -> int:
+        """Delete rows whose column is below cutoff in small committed batches.
+        
+        Keeps each write transaction short so concurrent metric writes are
+        not blocked for the duration of a large cleanup.
+        """
+        sql = f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {column} < ? LIMIT ?)'
+        deleted = 0
+        while True:
+            cursor = conn.execute(sql, (cutoff, CLEANUP_BATCH_SIZE))
+            conn.commit()
+            if cursor.rowcount <= 0:
+                return deleted
+            deleted += cursor.rowcount
+            
+    def _reclaim_free_pages(self, conn: sqlite3.Connection) -> None:
+        """Release free pages back to the filesystem"""
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            # Incremental mode: only free pages are moved, used pages stay put
+            # (a plain execute() only frees a single page; executescript runs
+            # the pragma to completion)
+            conn.executescript('PRAGMA incremental_vacuum;')
+        else:
+            # Databases created before incremental mode need a full VACUUM,
+            # which also converts them; skip it unless fragmentation is notable
+            freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            if page_count and freelist_count / page_count >= 0.1:
+                conn.execute('VACUUM')
+                
+        # Fold the WAL back so the database file actually shrinks
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        
     def detect_anomalies(self, metric_name: str, days: int = 7, threshold: float = 2.0) -> Dict[str, Any]:
         """Detect anomalies in a metric using simple statistical methods"""
+        # Get historical data
+        timestamps, data_points = self.get_metric_history_np(metric_name, days)
+        return self._compute_anomalies(metric_name, timestamps, data_points, threshold)
+        
+    def _compute_anomalies(self, metric_name: str, timestamps: np.ndarray, data_points: np.ndarray,
+                           threshold: float = 2.0, since: Optional[str] = None) -> Dict[str, Any]:
+        """Find values beyond threshold standard deviations in an array of metric values"""
         try:
-            # Get historical data
-            values = self.get_metric_history(metric_name, days)
-            
-            if len(values) < 3:
+            if data_points.size < 3:
                 return {
                     'metric': metric_name,
                     'anomalies_detected': False,
                     'reason': 'Insufficient data points'
                 }
                 
-            # Extract values and calculate statistics
-            data_points = [v for _, v in values]
-            timestamps = [t for t, _ in values]
-            
-            mean = sum(data_points) / len(data_points)
-            variance = sum((x - mean) ** 2 for x in data_points) / len(data_points)
-            std_dev = variance ** 0.5
+            # Calculate statistics, reusing the deviations for the z-scores
+            mean = data_points.mean().item()
+            deviations = data_points - mean
+            std_dev = np.sqrt(np.dot(deviations, deviations) / data_points.size).item()
             
             # Detect points beyond threshold standard deviations
             anomalies = []
-            for i, (ts, val) in enumerate(values):
-                z_score = (val - mean) / std_dev if std_dev > 0 else 0
-                if abs(z_score) > threshold:
+            if std_dev > 0:
+                z_scores = deviations / std_dev
+                mask = np.abs(z_scores) > threshold
+                if since is not None:
+                    # ISO timestamps compare correctly as strings
+                    mask &= timestamps > since
+                for i in np.flatnonzero(mask):
+                    val = data_points[i].item()
                     anomalies.append({
-                        'timestamp': ts,
+                        'timestamp': timestamps[i],
                         'value': val,
-                        'z_score': z_score,
+                        'z_score': z_scores[i].item(),
                         'deviation_pct': (val - mean) / mean * 100 if mean != 0 else 0
                     })
             
@@ -432,25 +642,71 @@ class DeusMemory:
                 'reason': f'Error: {str(e)}'
             }
             
+    def _refresh_summary_mirror(self, days: int) -> None:
+        """Bring the in-memory mirror up to date with the last days of metrics"""
+        mirror_days = _connection_pool.mirror_days
+        loaded_days = mirror_days.get(self.db_path, 0)
+        
+        conn = self.get_connection()
+        with conn:
+            if loaded_days < days:
+                # Load the full window
+                conn.execute('DELETE FROM mem.metrics')
+                conn.execute(
+                    'INSERT INTO mem.metrics SELECT timestamp, ts_epoch, metric_name, metric_value '
+                    'FROM main.metrics WHERE ts_epoch >= ?',
+                    (time.time() - days * 86400,)
+                )
+                mirror_days[self.db_path] = days
+            else:
+                # Only copy rows written since the last refresh (by any
+                # process), then drop rows that fell out of the window
+                conn.execute(
+                    'INSERT INTO mem.metrics SELECT timestamp, ts_epoch, metric_name, metric_value '
+                    'FROM main.metrics WHERE ts_epoch >= (SELECT coalesce(max(ts_epoch), 0) FROM mem.metrics) '
+                    'ON CONFLICT(timestamp, metric_name) DO UPDATE SET metric_value = excluded.metric_value'
+                )
+                conn.execute('DELETE FROM mem.metrics WHERE ts_epoch < ?',
+                             (time.time() - loaded_days * 86400,))
+        
+    def _known_metric_names(self) -> set:
+        """Get the names of all stored metrics, querying the database only once"""
+        known_metrics = _connection_pool.known_metrics.get(self.db_path)
+        if known_metrics is None:
+            cursor = self.get_connection().execute('SELECT DISTINCT metric_name FROM metrics')
+            known_metrics = {row[0] for row in cursor.fetchall()}
+            _connection_pool.known_metrics[self.db_path] = known_metrics
+        return known_metrics
+        
     def get_system_summary(self, days: int = 7) -> Dict[str, Any]:
         """Generate a comprehensive system summary with trends"""
         try:
-            # Get list of all metrics
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute('SELECT DISTINCT metric_name FROM metrics')
-            metrics = [row['metric_name'] for row in cursor.fetchall()]
-            
+            # Fetch the whole analysis window in one query instead of
+            # querying each metric twice; served from the in-memory mirror,
+            # which only has to pick up rows added since the last summary
+            self._refresh_summary_mirror(days)
+            history = self._query_histories('mem.metrics', days)
+            
+            # Get list of all metrics (cached, plus any new names that other
+            # processes wrote within the window)
+            known_metrics = self._known_metric_names()
+            known_metrics.update(history)
+            metrics = sorted(known_metrics)
+                
             # Calculate trends for each metric
             trends = {}
             anomalies = {}
+            empty = (np.empty(0, dtype=object), np.empty(0, dtype=np.float64))
             
             for metric in metrics:
-                trends[metric] = self.calculate_metric_trends(metric, days)
+                timestamps, values = history.get(metric, empty)
+                trends[metric] = self._compute_trends(metric, values)
                 # Check for anomalies only on critical metrics
-                if metric in ['cpu_load', 'memory_free_mb', 'disk_usage_root', 'open_ports']:
-                    anomalies[metric] = self.detect_anomalies(metric, days)
+                if metric in CRITICAL_METRICS:
+                    anomalies[metric] = self._compute_anomalies(metric, timestamps, values)
             
             # Get recent state changes
             cursor.execute('SELECT * FROM state_history ORDER BY timestamp DESC LIMIT 10')
@@ -511,27 +767,25 @@ class DeusMemory:
             # Check database size and cleanup if needed
             self.check_database_size()
             
-            # Detect anomalies in critical metrics
-            critical_metrics = ['cpu_load', 'memory_free_mb', 'disk_usage_root', 'open_ports']
-            
-            for metric in critical_metrics:
-                anomaly_result = self.detect_anomalies(metric)
-                if anomaly_result.get('anomalies_detected', False):
-                    anomalies = anomaly_result.get('anomalies', [])
-                    for anomaly in anomalies:
-                        # Only record recent anomalies (within the last hour)
-                        anomaly_time = datetime.fromisoformat(anomaly['timestamp'])
-                        if datetime.now() - anomaly_time < timedelta(hours=1):
-                            self.record_event(
-                                event_type='anomaly_detected',
-                                severity='warning',
-                                description=f"Anomaly detected in {metric}",
-                                details={
-                                    'metric': metric,
-                                    'value': anomaly['value'],
-                                    'deviation_pct': anomaly['deviation_pct']
-                                }
-                            )
+            # Detect anomalies in critical metrics, fetched in one query
+            history = self.get_metric_histories_np(metric_names=CRITICAL_METRICS)
+            
+            # Only record recent anomalies (within the last hour)
+            recent_cutoff_iso = (datetime.now() - timedelta(hours=1)).isoformat()
+            
+            for metric, (timestamps, values) in history.items():
+                anomaly_result = self._compute_anomalies(metric, timestamps, values, since=recent_cutoff_iso)
+                for anomaly in anomaly_result.get('anomalies', []):
+                    self.record_event(
+                        event_type='anomaly_detected',
+                        severity='warning',
+                        description=f"Anomaly detected in {metric}",
+                        details={
+                            'metric': metric,
+                            'value': anomaly['value'],
+                            'deviation_pct': anomaly['deviation_pct']
+                        }
+                    )
                             
             logger.info("Monitoring cycle completed")
         except Exception as e:
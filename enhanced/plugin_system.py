@@ -8,17 +8,19 @@ import json
 import logging
 import importlib
 import importlib.util
-import inspect
-import hashlib
 import time
 import traceback
-import uuid
 import re
-import shutil
-import subprocess
-from typing import Dict, List, Any, Optional, Tuple, Union, Callable, Type
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union, Callable, Type
 from abc import ABC, abstractmethod
 
+# Optional faster JSON backend for metadata and config files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -35,8 +37,18 @@ PLUGINS_DIR = os.path.join(INSTALL_DIR, "plugins")
 PLUGIN_CONFIG_DIR = os.path.join(INSTALL_DIR, "config/plugins")
 SANDBOX_DIR = os.path.join(INSTALL_DIR, "sandbox")
 
+# Directories already created by this process
+_ENSURED_DIRS = set()
+
+def _ensure_dir(path: str) -> None:
+    """Create a directory (and parents) once per process"""
+    if path in _ENSURED_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    _ENSURED_DIRS.add(path)
+
 # Set up logging
-os.makedirs(LOG_DIR, exist_ok=True)
+_ensure_dir(LOG_DIR)
 logging.basicConfig(
     filename=os.path.join(LOG_DIR, "plugin_system.log"),
     level=logging.INFO,
@@ -44,13 +56,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger("PluginSystem")
 
+# Shared formatter for per-plugin log handlers
+PLUGIN_LOG_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
 # Plugin metadata file name
 METADATA_FILENAME = "plugin_metadata.json"
 
+# Aggregated metadata from the last full scan, kept in the config directory
+PLUGIN_INDEX_FILENAME = ".plugin_index.json"
+
+# Copy buffer used when extracting plugin archives
+ZIP_COPY_BUFFER_SIZE = 1024 * 1024
+
+# Number of plugin directories above which metadata is read in parallel
+PARALLEL_SCAN_THRESHOLD = 8
+
+# Valid plugin IDs, and the characters replaced when deriving one
+_PLUGIN_ID_RE = re.compile(r'[a-zA-Z0-9_-]+')
+_INVALID_ID_CHARS_RE = re.compile(r'[^a-zA-Z0-9_-]')
+
 # Create required directories
-os.makedirs(PLUGINS_DIR, exist_ok=True)
-os.makedirs(PLUGIN_CONFIG_DIR, exist_ok=True)
-os.makedirs(SANDBOX_DIR, exist_ok=True)
+_ensure_dir(PLUGINS_DIR)
+_ensure_dir(PLUGIN_CONFIG_DIR)
+_ensure_dir(SANDBOX_DIR)
+
+def _parse_json(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _read_json(path: str) -> Any:
+    """Parse a JSON file, using orjson when available"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _write_json(path: str, data: Any) -> None:
+    """Write data as indented JSON, using orjson when available"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def _file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file"""
+    import hashlib
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _iter_files(path: str, prefix: str = "") -> Iterator[str]:
+    """Yield file paths under a directory, relative to it"""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            rel_path = os.path.join(prefix, entry.name)
+            if entry.is_dir():
+                # Like os.walk, don't descend into symlinked directories
+                if not entry.is_symlink():
+                    yield from _iter_files(entry.path, rel_path)
+            else:
+                yield rel_path
 
 class DeusPlugin(ABC):
     """Abstract base class for all plugins"""
@@ -75,6 +149,37 @@ class DeusPlugin(ABC):
         """Clean up any resources used by the plugin"""
         pass
 
+class PluginMetadata:
+    """Metadata for a single installed plugin"""
+    
+    __slots__ = ("plugin_id", "plugin_path", "name", "version", "description",
+                 "main_module", "main_class", "loaded", "enabled", "extra")
+    
+    # Fields every plugin metadata file must define
+    REQUIRED_FIELDS = ("name", "version", "description", "main_module", "main_class")
+    
+    def __init__(self, plugin_id: str, plugin_path: str, data: Dict[str, Any]):
+        """Build from a parsed metadata file"""
+        self.plugin_id = plugin_id
+        self.plugin_path = plugin_path
+        self.name = data["name"]
+        self.version = data["version"]
+        self.description = data["description"]
+        self.main_module = data["main_module"]
+        self.main_class = data["main_class"]
+        self.loaded = False
+        self.enabled = True
+        # Optional fields (author, etc.) are kept as-is
+        self.extra = {k: v for k, v in data.items() if k not in self.__slots__}
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the metadata as a plain dict for API responses"""
+        data = dict(self.extra)
+        for field in self.__slots__:
+            if field != "extra":
+                data[field] = getattr(self, field)
+        return data
+
 class PluginManager:
     """Manages the plugin system for Deus Ex Machina"""
     
@@ -87,9 +192,32 @@ class PluginManager:
         self.plugin_metadata = {}
         self.last_scan_time = 0
         
+        # Directory and per-plugin metadata mtimes from the last scan
+        self._dir_mtime = None
+        self._meta_mtime = {}
+        
+        # Candidate directories the last scan rejected, so fixing one is noticed:
+        # name -> (metadata mtime or None if missing, missing main module path or None)
+        self._rejected = {}
+        
+        # IDs with a .disabled marker in the config directory, filled on scan
+        self._disabled_set = None
+        
+        # config_dir mtime as of the last scan; adding or removing a marker changes it
+        self._config_mtime = None
+        
+        # Bound execute methods of loaded plugins, for dispatch
+        self._execute_fns = {}
+        
+        # Executed plugin modules kept across unload/load: (path, mtime, module)
+        self._module_cache = {}
+        
         # Ensure directories exist
-        os.makedirs(self.plugins_dir, exist_ok=True)
-        os.makedirs(self.config_dir, exist_ok=True)
+        _ensure_dir(self.plugins_dir)
+        _ensure_dir(self.config_dir)
+        
+        # Start from the persisted scan results if they are still current
+        self._load_index()
         
         logger.info(f"Plugin system initialized (plugins: {plugins_dir}, config: {config_dir})")
         
@@ -97,69 +225,39 @@ class PluginManager:
         """Scan for available plugins and load their metadata"""
         current_time = time.time()
         
-        # Skip if we've scanned recently, unless forced
-        if not force_reload and current_time - self.last_scan_time < 60:
-            return {
-                "success": True,
-                "message": "Using cached plugin data",
-                "plugins": list(self.plugin_metadata.values())
-            }
-            
         try:
+            # Skip if neither the plugins directory, any plugin's metadata nor
+            # the .disabled markers have changed, unless forced
+            dir_mtime = os.stat(self.plugins_dir).st_mtime_ns
+            if not force_reload and dir_mtime == self._dir_mtime and self._cache_is_current():
+                return {
+                    "success": True,
+                    "message": "Using cached plugin data",
+                    "plugins": [metadata.to_dict() for metadata in self.plugin_metadata.values()]
+                }
+                
             self.last_scan_time = current_time
-            found_plugins = []
+            self._dir_mtime = dir_mtime
+            self._refresh_disabled_set()
+            self._rejected.clear()
             
             # List all subdirectories in the plugins directory
-            for plugin_name in os.listdir(self.plugins_dir):
-                plugin_path = os.path.join(self.plugins_dir, plugin_name)
+            with os.scandir(self.plugins_dir) as entries:
+                candidates = [(entry.name, entry.path) for entry in entries if entry.is_dir()]
                 
-                # Skip if not a directory
-                if not os.path.isdir(plugin_path):
-                    continue
-                    
-                # Check for metadata file
-                metadata_path = os.path.join(plugin_path, METADATA_FILENAME)
-                if not os.path.exists(metadata_path):
-                    logger.warning(f"Plugin '{plugin_name}' missing metadata file")
-                    continue
-                    
-                # Load metadata
-                try:
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                        
-                    # Add plugin path to metadata
-                    metadata["plugin_path"] = plugin_path
-                    metadata["plugin_id"] = plugin_name
-                    
-                    # Verify required fields
-                    required_fields = ["name", "version", "description", "main_module", "main_class"]
-                    missing_fields = [field for field in required_fields if field not in metadata]
-                    
-                    if missing_fields:
-                        logger.warning(f"Plugin '{plugin_name}' metadata missing fields: {missing_fields}")
-                        continue
-                        
-                    # Verify main module exists
-                    main_module = metadata["main_module"]
-                    main_module_path = os.path.join(plugin_path, main_module)
-                    
-                    if not os.path.exists(main_module_path):
-                        logger.warning(f"Plugin '{plugin_name}' main module not found: {main_module}")
-                        continue
-                        
-                    # Add additional metadata
-                    metadata["loaded"] = plugin_name in self.loaded_plugins
-                    metadata["enabled"] = self._is_plugin_enabled(plugin_name)
-                    
-                    # Store metadata
-                    self.plugin_metadata[plugin_name] = metadata
-                    found_plugins.append(metadata)
-                    
-                except Exception as e:
-                    logger.error(f"Error loading plugin '{plugin_name}' metadata: {str(e)}")
-                    continue
-                    
+            # Metadata reads are independent, so overlap them for larger plugin sets
+            if len(candidates) >= PARALLEL_SCAN_THRESHOLD:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=min(32, len(candidates))) as executor:
+                    results = list(executor.map(lambda c: self._read_plugin_metadata(*c), candidates))
+            else:
+                results = [self._read_plugin_metadata(*c) for c in candidates]
+                
+            found = [metadata for metadata in results if metadata is not None]
+            self._save_index(found)
+            self._config_mtime = os.stat(self.config_dir).st_mtime_ns
+            found_plugins = [metadata.to_dict() for metadata in found]
+            
             return {
                 "success": True,
                 "message": f"Found {len(found_plugins)} plugins",
@@ -173,6 +271,199 @@ class PluginManager:
                 "error": str(e)
             }
             
+    def _cache_is_current(self) -> bool:
+        """Check cached metadata against the files another process may have changed"""
+        if os.stat(self.config_dir).st_mtime_ns != self._config_mtime:
+            return False
+            
+        for plugin_id, metadata in self.plugin_metadata.items():
+            try:
+                meta_mtime = os.stat(os.path.join(metadata.plugin_path, METADATA_FILENAME)).st_mtime_ns
+            except FileNotFoundError:
+                return False
+                
+            if meta_mtime != self._meta_mtime.get(plugin_id):
+                return False
+                
+        # Directories without valid metadata don't change plugins_dir when fixed
+        for plugin_name, (meta_mtime, main_module_path) in self._rejected.items():
+            if self._rejection_changed(plugin_name, meta_mtime, main_module_path):
+                return False
+                
+        return True
+        
+    def _rejection_changed(self, plugin_name: str, meta_mtime: Optional[int],
+                           main_module_path: Optional[str]) -> bool:
+        """Check whether a rejected candidate directory may now hold a valid plugin"""
+        try:
+            current_mtime = os.stat(os.path.join(self.plugins_dir, plugin_name, METADATA_FILENAME)).st_mtime_ns
+        except FileNotFoundError:
+            current_mtime = None
+            
+        if current_mtime != meta_mtime:
+            return True
+        return main_module_path is not None and os.path.exists(main_module_path)
+        
+    def _index_path(self) -> str:
+        """Path of the persisted plugin index"""
+        return os.path.join(self.config_dir, PLUGIN_INDEX_FILENAME)
+        
+    def _save_index(self, plugins: List[PluginMetadata]) -> None:
+        """Persist the results of a full scan so later processes can skip it"""
+        index = {
+            "plugins_dir": self.plugins_dir,
+            "dir_mtime": self._dir_mtime,
+            "plugins": {
+                metadata.plugin_id: {
+                    "mtime": self._meta_mtime[metadata.plugin_id],
+                    "metadata": metadata.to_dict()
+                }
+                for metadata in plugins
+            },
+            # Rejected directories too, so a later process notices them being fixed
+            "rejected": {
+                plugin_name: [meta_mtime, main_module_path]
+                for plugin_name, (meta_mtime, main_module_path) in self._rejected.items()
+            }
+        }
+        
+        # Write to a temporary file and rename so readers never see a partial index
+        index_path = self._index_path()
+        tmp_path = f"{index_path}.tmp"
+        try:
+            _write_json(tmp_path, index)
+            os.replace(tmp_path, index_path)
+        except Exception as e:
+            logger.warning(f"Could not save plugin index: {str(e)}")
+            
+    def _load_index(self) -> None:
+        """Populate the metadata cache from the persisted plugin index"""
+        try:
+            index = _read_json(self._index_path())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable plugin index: {str(e)}")
+            return
+            
+        try:
+            if index.get("plugins_dir") != self.plugins_dir:
+                return
+                
+            # Taken before the markers are read, so a marker changed meanwhile forces a scan
+            config_mtime = os.stat(self.config_dir).st_mtime_ns
+            
+            # Entries are only trusted while their metadata file is unchanged
+            complete = True
+            for plugin_id, entry in index["plugins"].items():
+                data = entry["metadata"]
+                try:
+                    meta_mtime = os.stat(os.path.join(data["plugin_path"], METADATA_FILENAME)).st_mtime_ns
+                except FileNotFoundError:
+                    complete = False
+                    continue
+                    
+                if meta_mtime != entry["mtime"]:
+                    complete = False
+                    continue
+                    
+                metadata = PluginMetadata(plugin_id, data["plugin_path"], data)
+                metadata.enabled = self._is_plugin_enabled(plugin_id)
+                self.plugin_metadata[plugin_id] = metadata
+                self._meta_mtime[plugin_id] = meta_mtime
+                
+            # Rejected directories must also be unchanged; indexes written
+            # without them can't vouch for those directories at all
+            rejected = index.get("rejected")
+            if rejected is None:
+                complete = False
+            else:
+                for plugin_name, (meta_mtime, main_module_path) in rejected.items():
+                    if self._rejection_changed(plugin_name, meta_mtime, main_module_path):
+                        complete = False
+                        break
+                    self._rejected[plugin_name] = (meta_mtime, main_module_path)
+                    
+            # With every entry current and the directory unchanged, scans can use the cache
+            if complete and os.stat(self.plugins_dir).st_mtime_ns == index["dir_mtime"]:
+                self._dir_mtime = index["dir_mtime"]
+                self._config_mtime = config_mtime
+        except Exception as e:
+            logger.warning(f"Ignoring invalid plugin index: {str(e)}")
+            self.plugin_metadata.clear()
+            self._meta_mtime.clear()
+            self._rejected.clear()
+            
+    def _read_plugin_metadata(self, plugin_name: str, plugin_path: str) -> Optional[PluginMetadata]:
+        """Load and validate one plugin's metadata, reusing it if unchanged"""
+        # Check for metadata file
+        metadata_path = os.path.join(plugin_path, METADATA_FILENAME)
+        try:
+            meta_mtime = os.stat(metadata_path).st_mtime_ns
+        except FileNotFoundError:
+            logger.warning(f"Plugin '{plugin_name}' missing metadata file")
+            self._rejected[plugin_name] = (None, None)
+            return None
+            
+        try:
+            # Only re-parse metadata that changed since the last scan
+            metadata = self.plugin_metadata.get(plugin_name)
+            if metadata is None or self._meta_mtime.get(plugin_name) != meta_mtime:
+                data = _read_json(metadata_path)
+                
+                # Verify required fields
+                missing_fields = [field for field in PluginMetadata.REQUIRED_FIELDS if field not in data]
+                
+                if missing_fields:
+                    logger.warning(f"Plugin '{plugin_name}' metadata missing fields: {missing_fields}")
+                    self._rejected[plugin_name] = (meta_mtime, None)
+                    return None
+                    
+                metadata = PluginMetadata(plugin_name, plugin_path, data)
+                
+            # Verify main module exists
+            main_module_path = os.path.join(plugin_path, metadata.main_module)
+            
+            if not os.path.exists(main_module_path):
+                logger.warning(f"Plugin '{plugin_name}' main module not found: {metadata.main_module}")
+                self._rejected[plugin_name] = (meta_mtime, main_module_path)
+                return None
+                
+            # Add additional metadata
+            metadata.loaded = plugin_name in self.loaded_plugins
+            metadata.enabled = self._is_plugin_enabled(plugin_name)
+            
+            # Store metadata
+            self.plugin_metadata[plugin_name] = metadata
+            self._meta_mtime[plugin_name] = meta_mtime
+            self._rejected.pop(plugin_name, None)
+            return metadata
+            
+        except Exception as e:
+            logger.error(f"Error loading plugin '{plugin_name}' metadata: {str(e)}")
+            self._rejected[plugin_name] = (meta_mtime, None)
+            return None
+            
+    def _ensure_plugin_known(self, plugin_id: str) -> bool:
+        """Make sure a plugin's metadata is loaded without a full rescan"""
+        if plugin_id in self.plugin_metadata:
+            return True
+            
+        # Only plain directory names can be plugins
+        if not plugin_id or os.sep in plugin_id or plugin_id in (".", ".."):
+            return False
+            
+        plugin_path = os.path.join(self.plugins_dir, plugin_id)
+        if not os.path.isdir(plugin_path):
+            return False
+            
+        return self._read_plugin_metadata(plugin_id, plugin_path) is not None
+        
+    def _metadata_dict(self, plugin_id: str) -> Optional[Dict[str, Any]]:
+        """Return a plugin's metadata as a dict, or None if unknown"""
+        metadata = self.plugin_metadata.get(plugin_id)
+        return metadata.to_dict() if metadata is not None else None
+        
     def load_plugin(self, plugin_id: str) -> Dict[str, Any]:
         """Load a specific plugin by ID"""
         try:
@@ -181,25 +472,21 @@ class PluginManager:
                 return {
                     "success": True,
                     "message": f"Plugin '{plugin_id}' already loaded",
-                    "plugin": self.plugin_metadata.get(plugin_id)
+                    "plugin": self._metadata_dict(plugin_id)
                 }
                 
             # Check if plugin exists
-            if plugin_id not in self.plugin_metadata:
-                # Scan plugins first
-                self.scan_plugins(force_reload=True)
-                
-                if plugin_id not in self.plugin_metadata:
-                    return {
-                        "success": False,
-                        "error": f"Plugin '{plugin_id}' not found"
-                    }
+            if not self._ensure_plugin_known(plugin_id):
+                return {
+                    "success": False,
+                    "error": f"Plugin '{plugin_id}' not found"
+                }
                     
             # Get metadata
             metadata = self.plugin_metadata[plugin_id]
-            plugin_path = metadata["plugin_path"]
-            main_module = metadata["main_module"]
-            main_class = metadata["main_class"]
+            plugin_path = metadata.plugin_path
+            main_module = metadata.main_module
+            main_class = metadata.main_class
             
             # Build module name
             module_path = os.path.join(plugin_path, main_module)
@@ -212,27 +499,39 @@ class PluginManager:
                     "error": f"Plugin '{plugin_id}' is disabled"
                 }
                 
-            # Load module
+            # Load module, reusing the one from a previous load if the source is unchanged
             try:
-                spec = importlib.util.spec_from_file_location(module_name, module_path)
-                if not spec:
-                    return {
-                        "success": False,
-                        "error": f"Could not load module spec for '{plugin_id}'"
-                    }
+                source_mtime = os.stat(module_path).st_mtime_ns
+                cached = self._module_cache.get(plugin_id)
+                if cached and cached[0] == module_path and cached[1] == source_mtime:
+                    module = cached[2]
+                    sys.modules[module_name] = module
+                else:
+                    # Only re-hash the source if it was touched since install
+                    expected_hash = metadata.extra.get("main_module_sha256")
+                    if expected_hash and source_mtime != metadata.extra.get("main_module_mtime_ns"):
+                        if _file_sha256(module_path) != expected_hash:
+                            logger.warning(f"Plugin '{plugin_id}' main module differs from the installed version")
+                            
+                    spec = importlib.util.spec_from_file_location(module_name, module_path)
+                    if not spec:
+                        return {
+                            "success": False,
+                            "error": f"Could not load module spec for '{plugin_id}'"
+                        }
+                        
+                    module = importlib.util.module_from_spec(spec)
+                    sys.modules[module_name] = module
+                    spec.loader.exec_module(module)
+                    self._module_cache[plugin_id] = (module_path, source_mtime, module)
                     
-                module = importlib.util.module_from_spec(spec)
-                sys.modules[module_name] = module
-                spec.loader.exec_module(module)
-                
                 # Get the plugin class
-                if not hasattr(module, main_class):
+                plugin_class = getattr(module, main_class, None)
+                if plugin_class is None:
                     return {
                         "success": False,
                         "error": f"Main class '{main_class}' not found in plugin '{plugin_id}'"
                     }
-                    
-                plugin_class = getattr(module, main_class)
                 
                 # Verify it's a DeusPlugin subclass
                 if not issubclass(plugin_class, DeusPlugin):
@@ -256,7 +555,7 @@ class PluginManager:
                 }
                 
                 # Create log directory for plugin
-                os.makedirs(context["log_dir"], exist_ok=True)
+                _ensure_dir(context["log_dir"])
                 
                 # Initialize the plugin
                 if not plugin_instance.initialize(context):
@@ -267,14 +566,15 @@ class PluginManager:
                     
                 # Store the loaded plugin
                 self.loaded_plugins[plugin_id] = plugin_instance
+                self._execute_fns[plugin_id] = plugin_instance.execute
                 
                 # Update metadata
-                self.plugin_metadata[plugin_id]["loaded"] = True
+                metadata.loaded = True
                 
                 return {
                     "success": True,
                     "message": f"Plugin '{plugin_id}' loaded successfully",
-                    "plugin": self.plugin_metadata[plugin_id]
+                    "plugin": metadata.to_dict()
                 }
                 
             except Exception as e:
@@ -313,15 +613,15 @@ class PluginManager:
                 
             # Remove from loaded plugins
             del self.loaded_plugins[plugin_id]
+            self._execute_fns.pop(plugin_id, None)
             
             # Update metadata
             if plugin_id in self.plugin_metadata:
-                self.plugin_metadata[plugin_id]["loaded"] = False
+                self.plugin_metadata[plugin_id].loaded = False
                 
-            # Remove module from sys.modules
-            module_name = f"deus_plugin_{plugin_id}"
-            if module_name in sys.modules:
-                del sys.modules[module_name]
+            # Remove module from sys.modules; the executed module stays in
+            # _module_cache so reloading unchanged source skips exec_module
+            sys.modules.pop(f"deus_plugin_{plugin_id}", None)
                 
             return {
                 "success": True,
@@ -336,70 +636,68 @@ class PluginManager:
             
     def execute_plugin(self, plugin_id: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Execute a plugin with the provided parameters"""
-        if not params:
-            params = {}
-            
+        params = params or {}
+        
+        # Check if plugin is loaded
+        execute = self._execute_fns.get(plugin_id)
+        if execute is None:
+            # Try to load it (load_plugin reports its own errors)
+            load_result = self.load_plugin(plugin_id)
+            if not load_result["success"]:
+                return load_result
+            execute = self._execute_fns[plugin_id]
+            
+        # Execute the plugin
+        start_time = time.perf_counter()
+        
         try:
-            # Check if plugin is loaded
-            if plugin_id not in self.loaded_plugins:
-                # Try to load it
-                load_result = self.load_plugin(plugin_id)
-                if not load_result["success"]:
-                    return load_result
-                    
-            # Get plugin instance
-            plugin = self.loaded_plugins[plugin_id]
-            
-            # Execute the plugin
-            start_time = time.time()
+            result = execute(params)
             
-            try:
-                result = plugin.execute(params)
-                
-                # Calculate execution time
-                execution_time = time.time() - start_time
-                
-                # Add execution metadata
-                result["execution_time"] = execution_time
-                result["executed_at"] = datetime.now().isoformat()
-                result["plugin_id"] = plugin_id
-                
-                return result
-            except Exception as e:
-                logger.error(f"Error executing plugin '{plugin_id}': {str(e)}")
-                logger.error(traceback.format_exc())
-                
-                return {
-                    "success": False,
-                    "error": f"Error executing plugin '{plugin_id}': {str(e)}",
-                    "execution_time": time.time() - start_time,
-                    "executed_at": datetime.now().isoformat(),
-                    "plugin_id": plugin_id
-                }
-                
+            # Add execution metadata
+            result.update(
+                execution_time=time.perf_counter() - start_time,
+                executed_at=datetime.now().isoformat(),
+                plugin_id=plugin_id
+            )
+            return result
         except Exception as e:
-            logger.error(f"Unexpected error executing plugin '{plugin_id}': {str(e)}")
+            logger.error(f"Error executing plugin '{plugin_id}': {str(e)}")
+            logger.error(traceback.format_exc())
+            
             return {
                 "success": False,
-                "error": str(e)
+                "error": f"Error executing plugin '{plugin_id}': {str(e)}",
+                "execution_time": time.perf_counter() - start_time,
+                "executed_at": datetime.now().isoformat(),
+                "plugin_id": plugin_id
             }
             
+    def _refresh_disabled_set(self) -> None:
+        """Reload the set of disabled plugin IDs from the config directory"""
+        disabled = set()
+        with os.scandir(self.config_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".disabled"):
+                    disabled.add(entry.name[:-len(".disabled")])
+        self._disabled_set = disabled
+        
     def _is_plugin_enabled(self, plugin_id: str) -> bool:
         """Check if a plugin is enabled"""
-        # Check for disable file
-        disable_file = os.path.join(self.config_dir, f"{plugin_id}.disabled")
-        return not os.path.exists(disable_file)
+        # Check the cached set of disable files
+        if self._disabled_set is None:
+            self._refresh_disabled_set()
+        return plugin_id not in self._disabled_set
         
     def _load_plugin_config(self, plugin_id: str) -> Dict[str, Any]:
         """Load configuration for a plugin"""
         config_file = os.path.join(self.config_dir, f"{plugin_id}.json")
         
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading config for plugin '{plugin_id}': {str(e)}")
+        try:
+            return _read_json(config_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading config for plugin '{plugin_id}': {str(e)}")
                 
         # Return empty config if file doesn't exist or has an error
         return {}
@@ -409,8 +707,7 @@ class PluginManager:
         config_file = os.path.join(self.config_dir, f"{plugin_id}.json")
         
         try:
-            with open(config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            _write_json(config_file, config)
             return True
         except Exception as e:
             logger.error(f"Error saving config for plugin '{plugin_id}': {str(e)}")
@@ -419,29 +716,32 @@ class PluginManager:
     def enable_plugin(self, plugin_id: str) -> Dict[str, Any]:
         """Enable a plugin"""
         # Check if plugin exists
-        if plugin_id not in self.plugin_metadata:
-            self.scan_plugins(force_reload=True)
-            if plugin_id not in self.plugin_metadata:
-                return {
-                    "success": False,
-                    "error": f"Plugin '{plugin_id}' not found"
-                }
+        if not self._ensure_plugin_known(plugin_id):
+            return {
+                "success": False,
+                "error": f"Plugin '{plugin_id}' not found"
+            }
                 
         # Remove disable file if it exists
         disable_file = os.path.join(self.config_dir, f"{plugin_id}.disabled")
-        if os.path.exists(disable_file):
-            try:
-                os.remove(disable_file)
-            except Exception as e:
-                logger.error(f"Error enabling plugin '{plugin_id}': {str(e)}")
-                return {
-                    "success": False,
-                    "error": f"Error enabling plugin '{plugin_id}': {str(e)}"
-                }
-                
+        try:
+            os.remove(disable_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error enabling plugin '{plugin_id}': {str(e)}")
+            self._disabled_set = None
+            return {
+                "success": False,
+                "error": f"Error enabling plugin '{plugin_id}': {str(e)}"
+            }
+            
+        if self._disabled_set is not None:
+            self._disabled_set.discard(plugin_id)
+            
         # Update metadata
         if plugin_id in self.plugin_metadata:
-            self.plugin_metadata[plugin_id]["enabled"] = True
+            self.plugin_metadata[plugin_id].enabled = True
             
         return {
             "success": True,
@@ -451,13 +751,11 @@ class PluginManager:
     def disable_plugin(self, plugin_id: str) -> Dict[str, Any]:
         """Disable a plugin"""
         # Check if plugin exists
-        if plugin_id not in self.plugin_metadata:
-            self.scan_plugins(force_reload=True)
-            if plugin_id not in self.plugin_metadata:
-                return {
-                    "success": False,
-                    "error": f"Plugin '{plugin_id}' not found"
-                }
+        if not self._ensure_plugin_known(plugin_id):
+            return {
+                "success": False,
+                "error": f"Plugin '{plugin_id}' not found"
+            }
                 
         # Unload plugin if it's loaded
         if plugin_id in self.loaded_plugins:
@@ -470,29 +768,40 @@ class PluginManager:
                 f.write(f"Disabled at {datetime.now().isoformat()}")
         except Exception as e:
             logger.error(f"Error disabling plugin '{plugin_id}': {str(e)}")
+            # The marker may or may not exist now; re-read it on next check
+            self._disabled_set = None
             return {
                 "success": False,
                 "error": f"Error disabling plugin '{plugin_id}': {str(e)}"
             }
             
+        if self._disabled_set is not None:
+            self._disabled_set.add(plugin_id)
+            
         # Update metadata
         if plugin_id in self.plugin_metadata:
-            self.plugin_metadata[plugin_id]["enabled"] = False
+            self.plugin_metadata[plugin_id].enabled = False
             
         return {
             "success": True,
             "message": f"Plugin '{plugin_id}' disabled"
         }
         
-    def install_plugin(self, source_path: str, plugin_id: str = None) -> Dict[str, Any]:
+    def install_plugin(self, source_path: str, plugin_id: str = None,
+                      move: bool = False) -> Dict[str, Any]:
         """Install a plugin from a directory or ZIP file"""
+        import shutil
+        
+        target_path = None
+        moved = False
+        
         try:
             # Generate plugin ID if not provided
             if not plugin_id:
                 plugin_id = self._generate_plugin_id(source_path)
                 
             # Validate plugin ID
-            if not re.match(r'^[a-zA-Z0-9_-]+$', plugin_id):
+            if not _PLUGIN_ID_RE.fullmatch(plugin_id):
                 return {
                     "success": False,
                     "error": "Invalid plugin ID (only alphanumeric, underscore, and hyphen allowed)"
@@ -508,71 +817,122 @@ class PluginManager:
             # Determine source type (directory or ZIP)
             is_zip = source_path.lower().endswith('.zip')
             
-            # Create target directory
             target_path = os.path.join(self.plugins_dir, plugin_id)
-            os.makedirs(target_path, exist_ok=True)
             
-            # Copy or extract files
+            # Copy, move or extract files
             if is_zip:
-                # Extract ZIP file
                 import zipfile
                 with zipfile.ZipFile(source_path, 'r') as zip_ref:
-                    zip_ref.extractall(target_path)
+                    # Validate the archive before extracting anything
+                    names = set(zip_ref.namelist())
+                    if METADATA_FILENAME not in names:
+                        return {
+                            "success": False,
+                            "error": f"Invalid plugin: metadata file '{METADATA_FILENAME}' not found"
+                        }
+                        
+                    main_module = _parse_json(zip_ref.read(METADATA_FILENAME)).get("main_module")
+                    if not main_module or main_module not in names:
+                        return {
+                            "success": False,
+                            "error": f"Invalid plugin: main module '{main_module}' not found"
+                        }
+                        
+                    # Extract ZIP file, skipping members that would land outside the plugin
+                    os.makedirs(target_path, exist_ok=True)
+                    target_root = os.path.realpath(target_path) + os.sep
+                    for info in zip_ref.infolist():
+                        member_path = os.path.realpath(os.path.join(target_path, info.filename))
+                        if not member_path.startswith(target_root):
+                            logger.warning(f"Skipping unsafe path in plugin archive: {info.filename}")
+                            continue
+                            
+                        if info.is_dir():
+                            os.makedirs(member_path, exist_ok=True)
+                            continue
+                            
+                        os.makedirs(os.path.dirname(member_path), exist_ok=True)
+                        with zip_ref.open(info) as src, open(member_path, 'wb') as dst:
+                            shutil.copyfileobj(src, dst, ZIP_COPY_BUFFER_SIZE)
             else:
-                # Copy directory contents
-                for item in os.listdir(source_path):
-                    s = os.path.join(source_path, item)
-                    d = os.path.join(target_path, item)
-                    if os.path.isdir(s):
-                        shutil.copytree(s, d)
-                    else:
-                        shutil.copy2(s, d)
+                # When the caller lets us consume the source, a same-filesystem
+                # install is a single rename; otherwise copy the directory
+                if move and os.stat(source_path).st_dev == os.stat(self.plugins_dir).st_dev:
+                    try:
+                        os.rename(source_path, target_path)
+                        moved = True
+                    except OSError as e:
+                        logger.warning(f"Could not move plugin source, copying instead: {str(e)}")
                         
-            # Verify plugin structure
+                if not moved:
+                    # Plain copies skip copy2's timestamp/xattr syscalls
+                    shutil.copytree(source_path, target_path, copy_function=shutil.copy)
+                    
+            # Verify plugin structure and load metadata
             metadata_path = os.path.join(target_path, METADATA_FILENAME)
-            if not os.path.exists(metadata_path):
+            try:
+                metadata = _read_json(metadata_path)
+            except FileNotFoundError:
                 # Cleanup
-                shutil.rmtree(target_path)
+                self._discard_install(target_path, source_path, moved)
                 return {
                     "success": False,
                     "error": f"Invalid plugin: metadata file '{METADATA_FILENAME}' not found"
                 }
                 
-            # Load metadata
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-                
             # Verify main module exists
             main_module = metadata.get("main_module")
             if not main_module or not os.path.exists(os.path.join(target_path, main_module)):
                 # Cleanup
-                shutil.rmtree(target_path)
+                self._discard_install(target_path, source_path, moved)
                 return {
                     "success": False,
                     "error": f"Invalid plugin: main module '{main_module}' not found"
                 }
                 
-            # Refresh plugin list
-            self.scan_plugins(force_reload=True)
+            # Record the main module's hash so later loads can detect changes
+            main_module_path = os.path.join(target_path, main_module)
+            metadata["main_module_sha256"] = _file_sha256(main_module_path)
+            metadata["main_module_mtime_ns"] = os.stat(main_module_path).st_mtime_ns
+            _write_json(metadata_path, metadata)
+            
+            # Precompile the plugin so load_plugin can use the cached bytecode
+            if not sys.dont_write_bytecode:
+                import compileall
+                if not compileall.compile_dir(target_path, quiet=1):
+                    logger.warning(f"Some files in plugin '{plugin_id}' failed to compile")
+                    
+            # Pick up the new plugin's metadata
+            self._ensure_plugin_known(plugin_id)
             
             return {
                 "success": True,
                 "message": f"Plugin '{plugin_id}' installed successfully",
-                "plugin": self.plugin_metadata.get(plugin_id)
+                "plugin": self._metadata_dict(plugin_id)
             }
         except Exception as e:
             logger.error(f"Error installing plugin: {str(e)}")
             # Cleanup if target path was created
-            if 'target_path' in locals() and os.path.exists(target_path):
-                shutil.rmtree(target_path)
+            if target_path and os.path.exists(target_path):
+                self._discard_install(target_path, source_path, moved)
                 
             return {
                 "success": False,
                 "error": f"Error installing plugin: {str(e)}"
             }
             
+    def _discard_install(self, target_path: str, source_path: str, moved: bool) -> None:
+        """Undo a failed install, returning a moved source to where it was"""
+        if moved:
+            os.rename(target_path, source_path)
+        else:
+            import shutil
+            shutil.rmtree(target_path)
+            
     def uninstall_plugin(self, plugin_id: str) -> Dict[str, Any]:
         """Uninstall a plugin"""
+        import shutil
+        
         try:
             # Check if plugin exists
             plugin_path = os.path.join(self.plugins_dir, plugin_id)
@@ -589,19 +949,21 @@ class PluginManager:
             # Remove plugin directory
             shutil.rmtree(plugin_path)
             
-            # Remove configuration
-            config_file = os.path.join(self.config_dir, f"{plugin_id}.json")
-            if os.path.exists(config_file):
-                os.remove(config_file)
-                
-            # Remove disable file if it exists
-            disable_file = os.path.join(self.config_dir, f"{plugin_id}.disabled")
-            if os.path.exists(disable_file):
-                os.remove(disable_file)
+            # Remove configuration and disable file if they exist
+            for suffix in (".json", ".disabled"):
+                try:
+                    os.remove(os.path.join(self.config_dir, f"{plugin_id}{suffix}"))
+                except FileNotFoundError:
+                    pass
+            if self._disabled_set is not None:
+                self._disabled_set.discard(plugin_id)
                 
             # Remove from metadata
             if plugin_id in self.plugin_metadata:
                 del self.plugin_metadata[plugin_id]
+            self._meta_mtime.pop(plugin_id, None)
+            self._rejected.pop(plugin_id, None)
+            self._module_cache.pop(plugin_id, None)
                 
             return {
                 "success": True,
@@ -622,7 +984,7 @@ class PluginManager:
             basename = os.path.splitext(basename)[0]
             
         # Clean up name
-        plugin_id = re.sub(r'[^a-zA-Z0-9_-]', '_', basename.lower())
+        plugin_id = _INVALID_ID_CHARS_RE.sub('_', basename.lower())
         
         # Ensure it's not empty
         if not plugin_id:
@@ -634,16 +996,14 @@ class PluginManager:
         """Get detailed information about a plugin"""
         try:
             # Check if plugin exists
-            if plugin_id not in self.plugin_metadata:
-                self.scan_plugins(force_reload=True)
-                if plugin_id not in self.plugin_metadata:
-                    return {
-                        "success": False,
-                        "error": f"Plugin '{plugin_id}' not found"
-                    }
+            if not self._ensure_plugin_known(plugin_id):
+                return {
+                    "success": False,
+                    "error": f"Plugin '{plugin_id}' not found"
+                }
                     
             # Get basic metadata
-            info = dict(self.plugin_metadata[plugin_id])
+            info = self.plugin_metadata[plugin_id].to_dict()
             
             # Add status information
             info["loaded"] = plugin_id in self.loaded_plugins
@@ -653,19 +1013,7 @@ class PluginManager:
             info["config"] = self._load_plugin_config(plugin_id)
             
             # Get plugin files
-            plugin_path = info["plugin_path"]
-            files = []
-            
-            for root, dirs, filenames in os.walk(plugin_path):
-                rel_path = os.path.relpath(root, plugin_path)
-                if rel_path == '.':
-                    rel_path = ''
-                    
-                for filename in filenames:
-                    file_path = os.path.join(rel_path, filename)
-                    files.append(file_path)
-                    
-            info["files"] = sorted(files)
+            info["files"] = sorted(_iter_files(info["plugin_path"]))
             
             # If plugin is loaded, get runtime metadata
             if plugin_id in self.loaded_plugins:
@@ -691,13 +1039,11 @@ class PluginManager:
         """Update configuration for a plugin"""
         try:
             # Check if plugin exists
-            if plugin_id not in self.plugin_metadata:
-                self.scan_plugins(force_reload=True)
-                if plugin_id not in self.plugin_metadata:
-                    return {
-                        "success": False,
-                        "error": f"Plugin '{plugin_id}' not found"
-                    }
+            if not self._ensure_plugin_known(plugin_id):
+                return {
+                    "success": False,
+                    "error": f"Plugin '{plugin_id}' not found"
+                }
                     
             # Save configuration
             if not self._save_plugin_config(plugin_id, config):
@@ -722,753 +1068,52 @@ class PluginManager:
                 "error": f"Error updating plugin config: {str(e)}"
             }
             
-class BackupRestorePlugin(DeusPlugin):
-    """Example plugin for backup and restore functionality"""
+if __name__ == "__main__":
+    import shutil
     
-    def initialize(self, context: Dict[str, Any]) -> bool:
-        """Initialize the plugin with given context"""
-        self.context = context
-        self.plugin_id = context["plugin_id"]
-        self.plugin_path = context["plugin_path"]
-        self.log_dir = context["log_dir"]
-        self.config = context["config"]
-        
-        # Set up logging
-        log_file = os.path.join(self.log_dir, "backup_restore.log")
-        self.logger = logging.getLogger(f"Plugin.{self.plugin_id}")
-        handler = logging.FileHandler(log_file)
-        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(handler)
-        self.logger.setLevel(logging.INFO)
-        
-        self.logger.info(f"Backup/Restore plugin initialized: {self.plugin_id}")
-        return True
-        
-    def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the plugin's main functionality"""
-        self.logger.info(f"Executing with params: {params}")
-        
-        action = params.get("action")
-        
-        if action == "backup":
-            return self._execute_backup(params)
-        elif action == "restore":
-            return self._execute_restore(params)
-        elif action == "list":
-            return self._list_backups(params)
-        else:
-            return {
-                "success": False,
-                "error": f"Unknown action: {action}",
-                "valid_actions": ["backup", "restore", "list"]
-            }
-            
-    def _execute_backup(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a backup operation"""
-        target_dir = params.get("target_dir", os.path.join(self.log_dir, "backups"))
-        source_dirs = params.get("source_dirs", ["/etc", "/var/log/deus-ex-machina"])
-        
-        # Create target directory if it doesn't exist
-        os.makedirs(target_dir, exist_ok=True)
-        
-        # Generate backup name
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        backup_name = f"backup_{timestamp}.tar.gz"
-        backup_path = os.path.join(target_dir, backup_name)
-        
-        try:
-            # Create temporary directory for backup
-            temp_dir = os.path.join("/tmp", f"deus_backup_{timestamp}")
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # Copy files to temporary directory
-            for source_dir in source_dirs:
-                if os.path.exists(source_dir):
-                    target_subdir = os.path.join(temp_dir, os.path.basename(source_dir))
-                    os.makedirs(target_subdir, exist_ok=True)
-                    
-                    # Use rsync if available
-                    try:
-                        subprocess.run(
-                            ["rsync", "-a", f"{source_dir}/", f"{target_subdir}/"],
-                            check=True, capture_output=True, text=True
-                        )
-                    except (subprocess.SubprocessError, FileNotFoundError):
-                        # Fallback to cp
-                        for root, dirs, files in os.walk(source_dir):
-                            rel_path = os.path.relpath(root, source_dir)
-                            target_path = os.path.join(target_subdir, rel_path)
-                            os.makedirs(target_path, exist_ok=True)
-                            
-                            for file in files:
-                                try:
-                                    shutil.copy2(
-                                        os.path.join(root, file),
-                                        os.path.join(target_path, file)
-                                    )
-                                except (shutil.Error, OSError):
-                                    pass
-                                    
-            # Create tar archive
-            subprocess.run(
-                ["tar", "-czf", backup_path, "-C", "/tmp", f"deus_backup_{timestamp}"],
-                check=True, capture_output=True, text=True
-            )
-            
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            self.logger.info(f"Backup created: {backup_path}")
-            
-            return {
-                "success": True,
-                "message": f"Backup created successfully: {backup_name}",
-                "backup_path": backup_path,
-                "timestamp": timestamp,
-                "source_dirs": source_dirs
-            }
-        except Exception as e:
-            self.logger.error(f"Error creating backup: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error creating backup: {str(e)}"
-            }
-            
-    def _execute_restore(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a restore operation"""
-        backup_path = params.get("backup_path")
-        
-        if not backup_path:
-            return {
-                "success": False,
-                "error": "Backup path not provided"
-            }
-            
-        if not os.path.exists(backup_path):
-            return {
-                "success": False,
-                "error": f"Backup not found: {backup_path}"
-            }
-            
-        try:
-            # Create temporary directory for extraction
-            temp_dir = os.path.join("/tmp", f"deus_restore_{int(time.time())}")
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # Extract archive
-            subprocess.run(
-                ["tar", "-xzf", backup_path, "-C", temp_dir],
-                check=True, capture_output=True, text=True
-            )
-            
-            # Find the extracted backup directory
-            backup_dir = None
-            for item in os.listdir(temp_dir):
-                if os.path.isdir(os.path.join(temp_dir, item)):
-                    backup_dir = os.path.join(temp_dir, item)
-                    break
-                    
-            if not backup_dir:
-                return {
-                    "success": False,
-                    "error": "Invalid backup archive structure"
-                }
-                
-            # Restore files
-            restored_dirs = []
-            
-            for item in os.listdir(backup_dir):
-                source_path = os.path.join(backup_dir, item)
-                if os.path.isdir(source_path):
-                    target_path = os.path.join("/", item)
-                    
-                    if os.path.exists(target_path):
-                        # Create backup of existing directory
-                        backup = os.path.join(temp_dir, f"{item}_original")
-                        shutil.copytree(target_path, backup)
-                        
-                        # Use rsync to restore
-                        try:
-                            subprocess.run(
-                                ["rsync", "-a", f"{source_path}/", f"{target_path}/"],
-                                check=True, capture_output=True, text=True
-                            )
-                            restored_dirs.append(target_path)
-                        except (subprocess.SubprocessError, FileNotFoundError):
-                            # Fallback to manual restore
-                            for root, dirs, files in os.walk(source_path):
-                                rel_path = os.path.relpath(root, source_path)
-                                restore_path = os.path.join(target_path, rel_path)
-                                os.makedirs(restore_path, exist_ok=True)
-                                
-                                for file in files:
-                                    try:
-                                        shutil.copy2(
-                                            os.path.join(root, file),
-                                            os.path.join(restore_path, file)
-                                        )
-                                    except (shutil.Error, OSError):
-                                        pass
-                                        
-                            restored_dirs.append(target_path)
-                            
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            self.logger.info(f"Restore completed from: {backup_path}")
-            
-            return {
-                "success": True,
-                "message": f"Restore completed successfully from: {os.path.basename(backup_path)}",
-                "restored_dirs": restored_dirs
-            }
-        except Exception as e:
-            self.logger.error(f"Error restoring backup: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error restoring backup: {str(e)}"
-            }
-            
-    def _list_backups(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """List available backups"""
-        backup_dir = params.get("backup_dir", os.path.join(self.log_dir, "backups"))
-        
-        if not os.path.exists(backup_dir):
-            return {
-                "success": True,
-                "message": "No backups found",
-                "backups": []
-            }
-            
-        try:
-            backups = []
-            
-            for item in os.listdir(backup_dir):
-                if item.startswith("backup_") and item.endswith(".tar.gz"):
-                    backup_path = os.path.join(backup_dir, item)
-                    
-                    # Get file stats
-                    stats = os.stat(backup_path)
-                    
-                    # Extract timestamp from filename
-                    timestamp_str = item[7:-7]  # Remove "backup_" and ".tar.gz"
-                    
-                    backups.append({
-                        "name": item,
-                        "path": backup_path,
-                        "size": stats.st_size,
-                        "created": datetime.fromtimestamp(stats.st_mtime).isoformat(),
-                        "timestamp": timestamp_str
-                    })
-                    
-            # Sort by creation time (newest first)
-            backups.sort(key=lambda x: x["created"], reverse=True)
-            
-            return {
-                "success": True,
-                "message": f"Found {len(backups)} backups",
-                "backups": backups,
-                "backup_dir": backup_dir
-            }
-        except Exception as e:
-            self.logger.error(f"Error listing backups: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error listing backups: {str(e)}"
-            }
-            
-    def get_metadata(self) -> Dict[str, Any]:
-        """Return plugin metadata"""
-        return {
+    # When run directly, perform a plugin scan and install the example plugins
+    manager = PluginManager()
+    
+    # Scan for existing plugins
+    scan_result = manager.scan_plugins(force_reload=True)
+    print(f"Found {len(scan_result.get('plugins', []))} plugins")
+    
+    # Example plugin modules ship as static files next to this module
+    templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugin_templates")
+    
+    examples = [
+        {
             "name": "Backup/Restore Plugin",
             "version": "1.0.0",
             "description": "Provides backup and restore functionality for Deus Ex Machina",
             "author": "Claude",
-            "status": "active",
-            "config": self.config
-        }
-        
-    def cleanup(self) -> bool:
-        """Clean up any resources used by the plugin"""
-        self.logger.info("Backup/Restore plugin cleanup")
-        return True
-
-class NetworkMonitorPlugin(DeusPlugin):
-    """Example plugin for network monitoring"""
-    
-    def initialize(self, context: Dict[str, Any]) -> bool:
-        """Initialize the plugin with given context"""
-        self.context = context
-        self.plugin_id = context["plugin_id"]
-        self.plugin_path = context["plugin_path"]
-        self.log_dir = context["log_dir"]
-        self.config = context["config"]
-        
-        # Set up logging
-        log_file = os.path.join(self.log_dir, "network_monitor.log")
-        self.logger = logging.getLogger(f"Plugin.{self.plugin_id}")
-        handler = logging.FileHandler(log_file)
-        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(handler)
-        self.logger.setLevel(logging.INFO)
-        
-        # Initialize connection tracking
-        self.connections_file = os.path.join(self.log_dir, "connections.json")
-        self.unusual_connections_file = os.path.join(self.log_dir, "unusual_connections.json")
-        
-        # Create files if they don't exist
-        for f in [self.connections_file, self.unusual_connections_file]:
-            if not os.path.exists(f):
-                with open(f, 'w') as file:
-                    json.dump({}, file)
-                    
-        self.logger.info(f"Network Monitor plugin initialized: {self.plugin_id}")
-        return True
-        
-    def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the plugin's main functionality"""
-        self.logger.info(f"Executing with params: {params}")
-        
-        action = params.get("action", "scan")
-        
-        if action == "scan":
-            return self._scan_network(params)
-        elif action == "analyze":
-            return self._analyze_connections(params)
-        elif action == "history":
-            return self._connection_history(params)
-        else:
-            return {
-                "success": False,
-                "error": f"Unknown action: {action}",
-                "valid_actions": ["scan", "analyze", "history"]
-            }
-            
-    def _scan_network(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Scan network connections"""
-        try:
-            # Check open connections with ss or netstat
-            try:
-                # Try ss command first
-                result = subprocess.run(
-                    ["ss", "-tunap"],
-                    check=True, capture_output=True, text=True
-                )
-                output = result.stdout
-            except (subprocess.SubprocessError, FileNotFoundError):
-                # Fall back to netstat
-                result = subprocess.run(
-                    ["netstat", "-tunap"],
-                    check=True, capture_output=True, text=True
-                )
-                output = result.stdout
-                
-            # Parse the output
-            connections = self._parse_connections(output)
-            
-            # Save connections to history
-            self._save_connections(connections)
-            
-            # Find unusual connections
-            unusual = self._find_unusual_connections(connections)
-            
-            return {
-                "success": True,
-                "message": f"Scanned {len(connections)} network connections",
-                "connections": connections,
-                "unusual_connections": unusual,
-                "timestamp": datetime.now().isoformat()
-            }
-        except Exception as e:
-            self.logger.error(f"Error scanning network: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error scanning network: {str(e)}"
-            }
-            
-    def _parse_connections(self, output: str) -> List[Dict[str, Any]]:
-        """Parse the output of ss or netstat commands"""
-        connections = []
-        
-        # Regular expressions for different connection details
-        ip_port_re = re.compile(r'(\d+\.\d+\.\d+\.\d+):(\d+)')
-        
-        for line in output.splitlines():
-            # Skip header lines
-            if not line or line.startswith('Netid') or line.startswith('Proto'):
-                continue
-                
-            # Extract information
-            fields = line.split()
-            if len(fields) < 5:
-                continue
-                
-            proto = fields[0]
-            
-            # Identify local and remote addresses
-            local_addr = ""
-            local_port = ""
-            remote_addr = ""
-            remote_port = ""
-            
-            if 'ss' in line:  # ss output format
-                local_match = ip_port_re.search(fields[4])
-                remote_match = ip_port_re.search(fields[5])
-            else:  # netstat output format
-                local_match = ip_port_re.search(fields[3])
-                remote_match = ip_port_re.search(fields[4])
-                
-            if local_match:
-                local_addr = local_match.group(1)
-                local_port = local_match.group(2)
-                
-            if remote_match:
-                remote_addr = remote_match.group(1)
-                remote_port = remote_match.group(2)
-                
-            # Get state and process (if available)
-            state = ""
-            process = ""
-            
-            for field in fields:
-                if field in ["LISTEN", "ESTABLISHED", "TIME_WAIT", "CLOSE_WAIT"]:
-                    state = field
-                if "pid=" in field or "users:" in field:
-                    process = field
-                    
-            connections.append({
-                "protocol": proto,
-                "local_addr": local_addr,
-                "local_port": local_port,
-                "remote_addr": remote_addr,
-                "remote_port": remote_port,
-                "state": state,
-                "process": process,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-        return connections
-        
-    def _save_connections(self, connections: List[Dict[str, Any]]) -> None:
-        """Save connections to history"""
-        # Load existing connections
-        try:
-            with open(self.connections_file, 'r') as f:
-                history = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            history = {}
-            
-        # Add new connections
-        timestamp = datetime.now().isoformat()
-        history[timestamp] = connections
-        
-        # Keep only the last 100 scans
-        if len(history) > 100:
-            # Sort by timestamp and keep only the most recent
-            items = sorted(history.items(), key=lambda x: x[0], reverse=True)
-            history = dict(items[:100])
-            
-        # Save back to file
-        with open(self.connections_file, 'w') as f:
-            json.dump(history, f)
-            
-    def _find_unusual_connections(self, connections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Find unusual connections based on history and known patterns"""
-        unusual = []
-        
-        # Load known connection patterns
-        known_patterns = self.config.get("known_patterns", [])
-        
-        # Common ports to ignore (SSH, DNS, HTTP, HTTPS, etc.)
-        common_ports = [
-            "22", "53", "80", "443", "25", "587", "993", "995",
-            "143", "8080", "8443", "3306", "5432", "27017"
-        ]
-        
-        for conn in connections:
-            is_unusual = False
-            reason = ""
-            
-            # Check for non-standard ports
-            if (conn["state"] == "LISTEN" and 
-                conn["local_port"] not in common_ports and
-                not any(conn["local_port"] == p.get("port") for p in known_patterns)):
-                is_unusual = True
-                reason = f"Unusual listening port: {conn['local_port']}"
-                
-            # Check for suspicious remote addresses
-            elif (conn["state"] == "ESTABLISHED" and
-                 not any(conn["remote_addr"] == p.get("addr") for p in known_patterns)):
-                # Check for private IP ranges
-                if not (conn["remote_addr"].startswith("10.") or
-                       conn["remote_addr"].startswith("192.168.") or
-                       conn["remote_addr"].startswith("127.") or
-                       conn["remote_addr"].startswith("172.")):
-                    is_unusual = True
-                    reason = f"Connection to external IP: {conn['remote_addr']}"
-                    
-            if is_unusual:
-                unusual_conn = dict(conn)
-                unusual_conn["reason"] = reason
-                unusual.append(unusual_conn)
-                
-                # Save to unusual connections file
-                self._save_unusual_connection(unusual_conn)
-                
-        return unusual
-        
-    def _save_unusual_connection(self, connection: Dict[str, Any]) -> None:
-        """Save unusual connection to file"""
-        try:
-            with open(self.unusual_connections_file, 'r') as f:
-                unusual = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            unusual = {}
-            
-        # Add new unusual connection
-        timestamp = datetime.now().isoformat()
-        
-        # Use connection details as key to avoid duplicates
-        key = f"{connection['protocol']}_{connection['local_addr']}:{connection['local_port']}"
-        key += f"_{connection['remote_addr']}:{connection['remote_port']}"
-        
-        unusual[key] = {
-            "connection": connection,
-            "first_seen": unusual.get(key, {}).get("first_seen", timestamp),
-            "last_seen": timestamp,
-            "count": unusual.get(key, {}).get("count", 0) + 1
-        }
-        
-        # Save back to file
-        with open(self.unusual_connections_file, 'w') as f:
-            json.dump(unusual, f)
-            
-    def _analyze_connections(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze connection patterns"""
-        try:
-            # Load connection history
-            try:
-                with open(self.connections_file, 'r') as f:
-                    history = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                history = {}
-                
-            # Load unusual connections
-            try:
-                with open(self.unusual_connections_file, 'r') as f:
-                    unusual = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                unusual = {}
-                
-            # Count connections by type
-            connection_stats = {
-                "total_scans": len(history),
-                "listening_ports": {},
-                "remote_connections": {},
-                "connection_states": {},
-                "protocols": {}
-            }
-            
-            # Process each scan
-            for timestamp, connections in history.items():
-                for conn in connections:
-                    # Count listening ports
-                    if conn["state"] == "LISTEN":
-                        port = conn["local_port"]
-                        if port not in connection_stats["listening_ports"]:
-                            connection_stats["listening_ports"][port] = 0
-                        connection_stats["listening_ports"][port] += 1
-                        
-                    # Count remote connections
-                    if conn["state"] == "ESTABLISHED" and conn["remote_addr"]:
-                        remote = f"{conn['remote_addr']}:{conn['remote_port']}"
-                        if remote not in connection_stats["remote_connections"]:
-                            connection_stats["remote_connections"][remote] = 0
-                        connection_stats["remote_connections"][remote] += 1
-                        
-                    # Count connection states
-                    state = conn["state"] or "UNKNOWN"
-                    if state not in connection_stats["connection_states"]:
-                        connection_stats["connection_states"][state] = 0
-                    connection_stats["connection_states"][state] += 1
-                    
-                    # Count protocols
-                    proto = conn["protocol"]
-                    if proto not in connection_stats["protocols"]:
-                        connection_stats["protocols"][proto] = 0
-                    connection_stats["protocols"][proto] += 1
-                    
-            # Sort by frequency
-            connection_stats["listening_ports"] = dict(
-                sorted(connection_stats["listening_ports"].items(), 
-                      key=lambda x: x[1], reverse=True)
-            )
-            
-            connection_stats["remote_connections"] = dict(
-                sorted(connection_stats["remote_connections"].items(), 
-                      key=lambda x: x[1], reverse=True)
-            )
-            
-            # Get top 10 unusual connections
-            unusual_list = []
-            for key, details in unusual.items():
-                unusual_list.append({
-                    "connection": details["connection"],
-                    "first_seen": details["first_seen"],
-                    "last_seen": details["last_seen"],
-                    "count": details["count"]
-                })
-                
-            # Sort by count
-            unusual_list.sort(key=lambda x: x["count"], reverse=True)
-            
-            return {
-                "success": True,
-                "message": "Connection analysis completed",
-                "stats": connection_stats,
-                "unusual_connections": unusual_list[:10],
-                "total_unusual": len(unusual)
-            }
-        except Exception as e:
-            self.logger.error(f"Error analyzing connections: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error analyzing connections: {str(e)}"
-            }
-            
-    def _connection_history(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Get connection history"""
-        try:
-            # Load connection history
-            try:
-                with open(self.connections_file, 'r') as f:
-                    history = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                history = {}
-                
-            # Get requested timespan
-            hours = int(params.get("hours", 24))
-            cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
-            
-            # Filter by timespan
-            filtered_history = {}
-            for timestamp, connections in history.items():
-                if timestamp >= cutoff:
-                    filtered_history[timestamp] = connections
-                    
-            return {
-                "success": True,
-                "message": f"Retrieved connection history for the last {hours} hours",
-                "history": filtered_history,
-                "scan_count": len(filtered_history),
-                "connection_count": sum(len(c) for c in filtered_history.values())
-            }
-        except Exception as e:
-            self.logger.error(f"Error retrieving connection history: {str(e)}")
-            return {
-                "success": False,
-                "error": f"Error retrieving connection history: {str(e)}"
-            }
-            
-    def get_metadata(self) -> Dict[str, Any]:
-        """Return plugin metadata"""
-        return {
+            "main_module": "backup_restore.py",
+            "main_class": "BackupRestorePlugin"
+        },
+        {
             "name": "Network Monitor Plugin",
             "version": "1.0.0",
             "description": "Monitors network connections and detects unusual activity",
             "author": "Claude",
-            "status": "active",
-            "config": self.config
+            "main_module": "network_monitor.py",
+            "main_class": "NetworkMonitorPlugin"
         }
-        
-    def cleanup(self) -> bool:
-        """Clean up any resources used by the plugin"""
-        self.logger.info("Network Monitor plugin cleanup")
-        return True
-
-if __name__ == "__main__":
-    # When run directly, perform a plugin scan and create an example plugin
-    manager = PluginManager()
-    
-    # Scan for existing plugins
-    scan_result = manager.scan_plugins(force_reload=True)
-    print(f"Found {len(scan_result.get('plugins', []))} plugins")
-    
-    # Create a backup/restore plugin directory if it doesn't exist
-    plugin_dir = os.path.join(PLUGINS_DIR, "backup_restore")
-    os.makedirs(plugin_dir, exist_ok=True)
+    ]
     
-    # Create plugin metadata
-    metadata = {
-        "name": "Backup/Restore Plugin",
-        "version": "1.0.0",
-        "description": "Provides backup and restore functionality for Deus Ex Machina",
-        "author": "Claude",
-        "main_module": "backup_restore.py",
-        "main_class": "BackupRestorePlugin"
-    }
-    
-    # Write metadata file
-    with open(os.path.join(plugin_dir, METADATA_FILENAME), 'w') as f:
-        json.dump(metadata, f, indent=2)
-        
-    # Create plugin module file
-    # Note: In a real scenario, we'd extract the class definition from this file
-    module_content = inspect.getsource(BackupRestorePlugin)
-    
-    with open(os.path.join(plugin_dir, "backup_restore.py"), 'w') as f:
-        f.write("#!/usr/bin/env python3\n")
-        f.write("# backup_restore.py - Plugin for backup and restore functionality\n\n")
-        f.write("import os\n")
-        f.write("import sys\n")
-        f.write("import json\n")
-        f.write("import logging\n")
-        f.write("import shutil\n")
-        f.write("import time\n")
-        f.write("import subprocess\n")
-        f.write("from datetime import datetime\n")
-        f.write("from typing import Dict, List, Any, Optional\n\n")
-        f.write("# Import plugin base class\n")
-        f.write("sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), \"../..\")))  \n")
-        f.write("from plugin_system import DeusPlugin\n\n")
-        f.write(module_content)
+    for metadata in examples:
+        # Create the plugin directory if it doesn't exist
+        plugin_dir = os.path.join(PLUGINS_DIR, metadata["main_module"][:-3])
+        os.makedirs(plugin_dir, exist_ok=True)
         
-    # Also create a network monitor plugin
-    plugin_dir = os.path.join(PLUGINS_DIR, "network_monitor")
-    os.makedirs(plugin_dir, exist_ok=True)
-    
-    # Create plugin metadata
-    metadata = {
-        "name": "Network Monitor Plugin",
-        "version": "1.0.0",
-        "description": "Monitors network connections and detects unusual activity",
-        "author": "Claude",
-        "main_module": "network_monitor.py",
-        "main_class": "NetworkMonitorPlugin"
-    }
-    
-    # Write metadata file
-    with open(os.path.join(plugin_dir, METADATA_FILENAME), 'w') as f:
-        json.dump(metadata, f, indent=2)
-        
-    # Create plugin module file
-    module_content = inspect.getsource(NetworkMonitorPlugin)
-    
-    with open(os.path.join(plugin_dir, "network_monitor.py"), 'w') as f:
-        f.write("#!/usr/bin/env python3\n")
-        f.write("# network_monitor.py - Plugin for network monitoring\n\n")
-        f.write("import os\n")
-        f.write("import sys\n")
-        f.write("import json\n")
-        f.write("import logging\n")
-        f.write("import subprocess\n")
-        f.write("import re\n")
-        f.write("from datetime import datetime, timedelta\n")
-        f.write("from typing import Dict, List, Any, Optional\n\n")
-        f.write("# Import plugin base class\n")
-        f.write("sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), \"../..\")))  \n")
-        f.write("from plugin_system import DeusPlugin\n\n")
-        f.write(module_content)
+        # Write metadata file
+        with open(os.path.join(plugin_dir, METADATA_FILENAME), 'w') as f:
+            json.dump(metadata, f, indent=2)
+            
+        # Copy the plugin module file
+        shutil.copyfile(
+            os.path.join(templates_dir, metadata["main_module"]),
+            os.path.join(plugin_dir, metadata["main_module"])
+        )
         
     # Scan again to verify plugins were created
     scan_result = manager.scan_plugins(force_reload=True)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# backup_restore.py - Plugin for backup and restore functionality
+
+import os
+import sys
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+# Import plugin base class
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from plugin_system import DeusPlugin, PLUGIN_LOG_FORMATTER
+
+class BackupRestorePlugin(DeusPlugin):
+    """Example plugin for backup and restore functionality"""
+    
+    def initialize(self, context: Dict[str, Any]) -> bool:
+        """Initialize the plugin with given context"""
+        self.context = context
+        self.plugin_id = context["plugin_id"]
+        self.plugin_path = context["plugin_path"]
+        self.log_dir = context["log_dir"]
+        self.config = context["config"]
+        
+        # Set up logging
+        log_file = os.path.join(self.log_dir, "backup_restore.log")
+        self.logger = logging.getLogger(f"Plugin.{self.plugin_id}")
+        # Loggers are process-wide, so only attach the handler on first initialize
+        if not self.logger.handlers:
+            handler = logging.FileHandler(log_file)
+            handler.setFormatter(PLUGIN_LOG_FORMATTER)
+            self.logger.addHandler(handler)
+        self.logger.setLevel(logging.INFO)
+        
+        self.logger.info(f"Backup/Restore plugin initialized: {self.plugin_id}")
+        return True
+        
+    def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the plugin's main functionality"""
+        self.logger.info(f"Executing with params: {params}")
+        
+        action = params.get("action")
+        
+        if action == "backup":
+            return self._execute_backup(params)
+        elif action == "restore":
+            return self._execute_restore(params)
+        elif action == "list":
+            return self._list_backups(params)
+        else:
+            return {
+                "success": False,
+                "error": f"Unknown action: {action}",
+                "valid_actions": ["backup", "restore", "list"]
+            }
+            
+    def _execute_backup(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a backup operation"""
+        import shutil
+        import subprocess
+        
+        target_dir = params.get("target_dir", os.path.join(self.log_dir, "backups"))
+        source_dirs = params.get("source_dirs", ["/etc", "/var/log/deus-ex-machina"])
+        
+        # Create target directory if it doesn't exist
+        os.makedirs(target_dir, exist_ok=True)
+        
+        # Generate backup name
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        backup_name = f"backup_{timestamp}.tar.gz"
+        backup_path = os.path.join(target_dir, backup_name)
+        
+        try:
+            # Let tar read each source in place (no staging copy in /tmp). Each
+            # one is added as <basename>/ under a deus_backup_<timestamp>/
+            # prefix, the layout restores expect
+            tar_sources = []
+            for source_dir in source_dirs:
+                if os.path.exists(source_dir):
+                    source_dir = os.path.abspath(source_dir)
+                    tar_sources += ["-C", os.path.dirname(source_dir), os.path.basename(source_dir)]
+                    
+            if not tar_sources:
+                return {
+                    "success": False,
+                    "error": "None of the source directories exist"
+                }
+                
+            # Compress on every core with pigz when it is installed
+            if shutil.which("pigz"):
+                compress = ["--use-compress-program", f"pigz -p {os.cpu_count() or 1}"]
+            else:
+                compress = ["-z"]
+                
+            # Create tar archive, in a stable name order
+            result = subprocess.run(
+                ["tar", "-cf", backup_path, *compress, "--sort=name", "--ignore-failed-read",
+                 f"--transform=s,^,deus_backup_{timestamp}/,S", *tar_sources],
+                capture_output=True, text=True
+            )
+            
+            # Exit status 1 only means some files changed while being read
+            if result.returncode > 1:
+                raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+                
+            self.logger.info(f"Backup created: {backup_path}")
+            
+            return {
+                "success": True,
+                "message": f"Backup created successfully: {backup_name}",
+                "backup_path": backup_path,
+                "timestamp": timestamp,
+                "source_dirs": source_dirs
+            }
+        except Exception as e:
+            self.logger.error(f"Error creating backup: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error creating backup: {str(e)}"
+            }
+            
+    def _execute_restore(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a restore operation"""
+        import shutil
+        import tarfile
+        
+        backup_path = params.get("backup_path")
+        
+        if not backup_path:
+            return {
+                "success": False,
+                "error": "Backup path not provided"
+            }
+            
+        if not os.path.exists(backup_path):
+            return {
+                "success": False,
+                "error": f"Backup not found: {backup_path}"
+            }
+            
+        try:
+            # Read the whole archive once before touching the live tree, so a
+            # truncated or corrupt backup fails without restoring anything
+            self._verify_archive(backup_path)
+            
+            # Create temporary directory for the files the restore replaces
+            temp_dir = os.path.join("/tmp", f"deus_restore_{int(time.time())}")
+            os.makedirs(temp_dir, exist_ok=True)
+            
+            # Extract like the tar command would (absolute symlinks, owners);
+            # newer Pythons otherwise warn or apply the restrictive data filter
+            extract_kwargs = {"filter": "fully_trusted"} if hasattr(tarfile, "data_filter") else {}
+            
+            found_backup_dir = False
+            restored_dirs = []
+            skipped_items = set()
+            
+            # Stream members from the archive straight into place, without
+            # extracting to a staging directory first
+            with tarfile.open(backup_path, mode="r|gz") as tar:
+                for member in tar:
+                    # Strip the deus_backup_<timestamp>/ directory
+                    parts = member.name.split("/", 1)
+                    found_backup_dir = True
+                    if len(parts) < 2 or not parts[1]:
+                        continue
+                        
+                    relative = parts[1]
+                    item = relative.split("/", 1)[0]
+                    if item in skipped_items or ".." in relative.split("/"):
+                        continue
+                        
+                    target_path = os.path.join("/", item)
+                    
+                    if target_path not in restored_dirs:
+                        # Only directories that already exist get restored
+                        if not ((member.isdir() or "/" in relative) and os.path.exists(target_path)):
+                            skipped_items.add(item)
+                            continue
+                            
+                        restored_dirs.append(target_path)
+                        
+                    # Move existing files and links out of the way, keeping them
+                    # under <item>_original, instead of copying whole directories
+                    # aside before restoring into them
+                    destination = os.path.join("/", relative)
+                    if not member.isdir() and os.path.lexists(destination) and not os.path.isdir(destination):
+                        self._move_aside(destination, os.path.join(temp_dir, f"{item}_original", relative.split("/", 1)[-1]))
+                        
+                    member.name = relative
+                    if member.islnk():
+                        member.linkname = member.linkname.split("/", 1)[-1]
+                    tar.extract(member, "/", **extract_kwargs)
+                    
+            if not found_backup_dir:
+                return {
+                    "success": False,
+                    "error": "Invalid backup archive structure"
+                }
+                
+            # Clean up temporary directory
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            
+            self.logger.info(f"Restore completed from: {backup_path}")
+            
+            return {
+                "success": True,
+                "message": f"Restore completed successfully from: {os.path.basename(backup_path)}",
+                "restored_dirs": restored_dirs
+            }
+        except Exception as e:
+            self.logger.error(f"Error restoring backup: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error restoring backup: {str(e)}"
+            }
+            
+    def _verify_archive(self, backup_path: str) -> None:
+        """Read a .tar.gz end to end, raising if it is truncated or corrupt"""
+        import gzip
+        import tarfile
+        
+        with gzip.open(backup_path, "rb") as stream:
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                for _ in tar:
+                    pass
+            # Drain the rest so gzip checks the trailer CRC and length
+            while stream.read(1 << 20):
+                pass
+                
+    def _move_aside(self, path: str, backup: str) -> None:
+        """Move a file to backup, copying it when they are on different filesystems"""
+        import errno
+        import shutil
+        
+        os.makedirs(os.path.dirname(backup), exist_ok=True)
+        try:
+            os.rename(path, backup)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copy2(path, backup, follow_symlinks=False)
+            os.unlink(path)
+            
+    def _list_backups(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """List available backups"""
+        backup_dir = params.get("backup_dir", os.path.join(self.log_dir, "backups"))
+        
+        if not os.path.exists(backup_dir):
+            return {
+                "success": True,
+                "message": "No backups found",
+                "backups": []
+            }
+            
+        try:
+            found = []
+            
+            with os.scandir(backup_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith("backup_") and entry.name.endswith(".tar.gz"):
+                        # Get file stats
+                        stats = entry.stat()
+                        found.append((stats.st_mtime, entry.name, entry.path, stats.st_size))
+                        
+            # Sort by creation time (newest first), on the raw mtime
+            found.sort(key=lambda x: x[0], reverse=True)
+            
+            backups = []
+            for mtime, name, backup_path, size in found:
+                backups.append({
+                    "name": name,
+                    "path": backup_path,
+                    "size": size,
+                    "created": datetime.fromtimestamp(mtime).isoformat(),
+                    "timestamp": name[7:-7]  # Remove "backup_" and ".tar.gz"
+                })
+                
+            return {
+                "success": True,
+                "message": f"Found {len(backups)} backups",
+                "backups": backups,
+                "backup_dir": backup_dir
+            }
+        except Exception as e:
+            self.logger.error(f"Error listing backups: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error listing backups: {str(e)}"
+            }
+            
+    def get_metadata(self) -> Dict[str, Any]:
+        """Return plugin metadata"""
+        return {
+            "name": "Backup/Restore Plugin",
+            "version": "1.0.0",
+            "description": "Provides backup and restore functionality for Deus Ex Machina",
+            "author": "Claude",
+            "status": "active",
+            "config": self.config
+        }
+        
+    def cleanup(self) -> bool:
+        """Clean up any resources used by the plugin"""
+        self.logger.info("Backup/Restore plugin cleanup")
+        return True
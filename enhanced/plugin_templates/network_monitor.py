@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+# network_monitor.py - Plugin for network monitoring
+
+import os
+import sys
+import json
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+# Import plugin base class
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from plugin_system import DeusPlugin, PLUGIN_LOG_FORMATTER
+
+# Compact encoder for the state files rewritten or appended on every scan
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+class NetworkMonitorPlugin(DeusPlugin):
+    """Example plugin for network monitoring"""
+    
+    # Scans kept in the connection history, and how many extra lines the
+    # append-only log may grow by before it is compacted back down
+    MAX_HISTORY_SCANS = 100
+    HISTORY_COMPACT_SLACK = 10
+    
+    # Common ports to ignore (SSH, DNS, HTTP, HTTPS, etc.)
+    COMMON_PORTS = frozenset([
+        "22", "53", "80", "443", "25", "587", "993", "995",
+        "143", "8080", "8443", "3306", "5432", "27017"
+    ])
+    
+    # Private and loopback address prefixes
+    PRIVATE_ADDR_PREFIXES = ("10.", "192.168.", "127.", "172.")
+    
+    # Local and (when it has a numeric port) remote address of an ss or
+    # netstat line, matched in a single pass
+    ADDRESS_PAIR_RE = re.compile(
+        r'(?P<local_addr>\d+\.\d+\.\d+\.\d+):(?P<local_port>\d+)\s+'
+        r'(?:(?P<remote_addr>\d+\.\d+\.\d+\.\d+):(?P<remote_port>\d+))?'
+    )
+    CONNECTION_STATES = frozenset(["LISTEN", "ESTABLISHED", "TIME_WAIT", "CLOSE_WAIT"])
+    
+    # Kernel socket tables, and the hex socket states that map onto the
+    # states above (others are reported without a state, as with ss)
+    PROC_NET_TABLES = (
+        ("tcp", "/proc/net/tcp"), ("tcp", "/proc/net/tcp6"),
+        ("udp", "/proc/net/udp"), ("udp", "/proc/net/udp6")
+    )
+    PROC_NET_STATES = {"01": "ESTABLISHED", "06": "TIME_WAIT", "08": "CLOSE_WAIT", "0A": "LISTEN"}
+    
+    def initialize(self, context: Dict[str, Any]) -> bool:
+        """Initialize the plugin with given context"""
+        self.context = context
+        self.plugin_id = context["plugin_id"]
+        self.plugin_path = context["plugin_path"]
+        self.log_dir = context["log_dir"]
+        self.config = context["config"]
+        
+        # Set up logging
+        log_file = os.path.join(self.log_dir, "network_monitor.log")
+        self.logger = logging.getLogger(f"Plugin.{self.plugin_id}")
+        # Loggers are process-wide, so only attach the handler on first initialize
+        if not self.logger.handlers:
+            handler = logging.FileHandler(log_file)
+            handler.setFormatter(PLUGIN_LOG_FORMATTER)
+            self.logger.addHandler(handler)
+        self.logger.setLevel(logging.INFO)
+        
+        # Initialize connection tracking
+        self.connections_file = os.path.join(self.log_dir, "connections.jsonl")
+        self.unusual_connections_file = os.path.join(self.log_dir, "unusual_connections.json")
+        self.stats_file = os.path.join(self.log_dir, "analyze_stats.json")
+        self._history_lines = None
+        self._stats = None
+        
+        # Index the known connection patterns for constant-time lookups
+        known_patterns = self.config.get("known_patterns", [])
+        self._known_ports = frozenset(p["port"] for p in known_patterns if "port" in p)
+        self._known_addrs = frozenset(p["addr"] for p in known_patterns if "addr" in p)
+        
+        # Create files if they don't exist
+        if not os.path.exists(self.connections_file):
+            open(self.connections_file, 'a', encoding='utf-8').close()
+        if not os.path.exists(self.unusual_connections_file):
+            with open(self.unusual_connections_file, 'w', encoding='utf-8') as file:
+                json.dump({}, file)
+                
+        # Unusual connections are tracked in memory and written once per scan
+        try:
+            with open(self.unusual_connections_file, 'r', encoding='utf-8') as f:
+                self._unusual = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            self._unusual = {}
+            
+        self.logger.info(f"Network Monitor plugin initialized: {self.plugin_id}")
+        return True
+        
+    def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the plugin's main functionality"""
+        self.logger.info(f"Executing with params: {params}")
+        
+        action = params.get("action", "scan")
+        
+        if action == "scan":
+            return self._scan_network(params)
+        elif action == "analyze":
+            return self._analyze_connections(params)
+        elif action == "history":
+            return self._connection_history(params)
+        else:
+            return {
+                "success": False,
+                "error": f"Unknown action: {action}",
+                "valid_actions": ["scan", "analyze", "history"]
+            }
+            
+    def _scan_network(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Scan network connections"""
+        import subprocess
+        
+        try:
+            if os.path.exists(self.PROC_NET_TABLES[0][1]):
+                # Read the kernel socket tables directly, no subprocess needed
+                connections = self._scan_proc_net()
+            else:
+                # Check open connections with ss or netstat
+                try:
+                    # Try ss command first
+                    result = subprocess.run(
+                        ["ss", "-tunap"],
+                        check=True, capture_output=True, text=True
+                    )
+                    output = result.stdout
+                except (subprocess.SubprocessError, FileNotFoundError):
+                    # Fall back to netstat
+                    result = subprocess.run(
+                        ["netstat", "-tunap"],
+                        check=True, capture_output=True, text=True
+                    )
+                    output = result.stdout
+                    
+                # Parse the output
+                connections = self._parse_connections(output)
+                
+            # Save connections to history
+            self._save_connections(connections)
+            
+            # Find unusual connections
+            unusual = self._find_unusual_connections(connections)
+            
+            return {
+                "success": True,
+                "message": f"Scanned {len(connections)} network connections",
+                "connections": connections,
+                "unusual_connections": unusual,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            self.logger.error(f"Error scanning network: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error scanning network: {str(e)}"
+            }
+            
+    def _scan_proc_net(self) -> List[Dict[str, Any]]:
+        """Read connections from /proc/net in the same shape as _parse_connections"""
+        import socket
+        
+        def decode(address: str) -> Tuple[str, int]:
+            # Addresses are hex in host (little-endian) order, one 32-bit word at a time
+            addr_hex, port_hex = address.split(":")
+            packed = b"".join(bytes.fromhex(addr_hex[i:i + 8])[::-1] for i in range(0, len(addr_hex), 8))
+            if len(packed) == 16 and packed[:12] == b"\x00" * 10 + b"\xff\xff":
+                # IPv4-mapped IPv6 address
+                packed = packed[12:]
+            family = socket.AF_INET if len(packed) == 4 else socket.AF_INET6
+            return socket.inet_ntop(family, packed), int(port_hex, 16)
+            
+        connections = []
+        timestamp = datetime.now().isoformat()
+        
+        for proto, path in self.PROC_NET_TABLES:
+            try:
+                with open(path, 'r') as f:
+                    lines = f.readlines()[1:]
+            except OSError:
+                continue
+                
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 10:
+                    continue
+                    
+                local_addr, local_port = decode(fields[1])
+                remote_addr, remote_port = decode(fields[2])
+                
+                connections.append({
+                    "protocol": proto,
+                    "local_addr": local_addr,
+                    "local_port": str(local_port),
+                    # Unconnected sockets have no remote end (ss shows "*")
+                    "remote_addr": remote_addr if remote_port else "",
+                    "remote_port": str(remote_port) if remote_port else "",
+                    "state": self.PROC_NET_STATES.get(fields[3], ""),
+                    "process": fields[9],
+                    "timestamp": timestamp
+                })
+                
+        # Swap socket inodes for the owning processes, formatted like ss
+        processes = self._socket_processes({conn["process"] for conn in connections})
+        for conn in connections:
+            users = processes.get(conn["process"])
+            conn["process"] = f"users:({','.join(users)})" if users else ""
+            
+        return connections
+        
+    def _socket_processes(self, inodes: set) -> Dict[str, List[str]]:
+        """Map socket inodes to the processes holding them open"""
+        processes = {}
+        if not inodes:
+            return processes
+            
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            fd_dir = f"/proc/{pid}/fd"
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            name = None
+            for fd in fds:
+                try:
+                    link = os.readlink(f"{fd_dir}/{fd}")
+                except OSError:
+                    continue
+                if not link.startswith("socket:["):
+                    continue
+                inode = link[8:-1]
+                if inode not in inodes:
+                    continue
+                if name is None:
+                    try:
+                        with open(f"/proc/{pid}/comm", 'r') as f:
+                            name = f.read().strip()
+                    except OSError:
+                        name = ""
+                processes.setdefault(inode, []).append(f'("{name}",pid={pid},fd={fd})')
+                
+        return processes
+        
+    def _parse_connections(self, output: str) -> List[Dict[str, Any]]:
+        """Parse the output of ss or netstat commands"""
+        connections = []
+        timestamp = datetime.now().isoformat()
+        
+        for line in output.splitlines():
+            # Skip header lines
+            if not line or line.startswith('Netid') or line.startswith('Proto'):
+                continue
+                
+            # Extract information
+            fields = line.split()
+            if len(fields) < 5:
+                continue
+                
+            proto = fields[0]
+            
+            # Identify local and remote addresses; the pair is found by shape,
+            # so ss and netstat column layouts both work
+            match = self.ADDRESS_PAIR_RE.search(line)
+            addresses = match.groupdict(default="") if match else {
+                "local_addr": "", "local_port": "", "remote_addr": "", "remote_port": ""
+            }
+            
+            # Get state and process (if available)
+            state = ""
+            process = ""
+            
+            for field in fields:
+                if field in self.CONNECTION_STATES:
+                    state = field
+                elif "pid=" in field or "users:" in field:
+                    process = field
+                    
+            connections.append({
+                "protocol": proto,
+                "local_addr": addresses["local_addr"],
+                "local_port": addresses["local_port"],
+                "remote_addr": addresses["remote_addr"],
+                "remote_port": addresses["remote_port"],
+                "state": state,
+                "process": process,
+                "timestamp": timestamp
+            })
+            
+        return connections
+        
+    def _save_connections(self, connections: List[Dict[str, Any]]) -> None:
+        """Append a scan to the connection history log"""
+        from itertools import islice
+        
+        stats = self._get_stats()
+        
+        # One line per scan, so saving never rewrites earlier scans
+        timestamp = datetime.now().isoformat()
+        with open(self.connections_file, 'a', encoding='utf-8') as f:
+            f.write(_encode_json({"timestamp": timestamp, "connections": connections}) + "\n")
+        self._history_lines += 1
+        self._count_connections(stats, connections, 1)
+        
+        # Take the scan that just dropped out of the last 100 back out of the
+        # stats; it is always within the first few lines of the log
+        if self._history_lines > self.MAX_HISTORY_SCANS:
+            with open(self.connections_file, 'r', encoding='utf-8') as f:
+                line = next(islice(f, self._history_lines - self.MAX_HISTORY_SCANS - 1, None))
+            try:
+                self._count_connections(stats, json.loads(line)["connections"], -1)
+            except json.JSONDecodeError:
+                pass
+                
+        # Once the log has grown past the limit, keep only the last 100 scans
+        if self._history_lines > self.MAX_HISTORY_SCANS + self.HISTORY_COMPACT_SLACK:
+            self._compact_connections()
+            
+        self._save_stats(stats)
+        
+    def _get_stats(self) -> Dict[str, Any]:
+        """Return the running connection stats, loading or rebuilding them once"""
+        if self._stats is not None:
+            return self._stats
+            
+        try:
+            with open(self.connections_file, 'r', encoding='utf-8') as f:
+                self._history_lines = sum(1 for _ in f)
+        except FileNotFoundError:
+            self._history_lines = 0
+            
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            stats = None
+            
+        # Rebuild from the log if the stats don't describe it (missing file,
+        # or a crash between appending a scan and saving the stats)
+        if not stats or stats.get("history_lines") != self._history_lines:
+            stats = {
+                "total_scans": 0,
+                "listening_ports": {},
+                "remote_connections": {},
+                "connection_states": {},
+                "protocols": {}
+            }
+            for connections in self._load_connections().values():
+                self._count_connections(stats, connections, 1)
+                
+        self._stats = stats
+        return stats
+        
+    def _save_stats(self, stats: Dict[str, Any]) -> None:
+        """Persist the running connection stats"""
+        stats["history_lines"] = self._history_lines
+        tmp_path = f"{self.stats_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(_encode_json(stats))
+        os.replace(tmp_path, self.stats_file)
+        
+    def _count_connections(self, stats: Dict[str, Any], connections: List[Dict[str, Any]], delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) one scan's connections from the stats"""
+        def count(counter, key):
+            value = counter.get(key, 0) + delta
+            if value > 0:
+                counter[key] = value
+            else:
+                counter.pop(key, None)
+                
+        stats["total_scans"] += delta
+        
+        for conn in connections:
+            # Count listening ports
+            if conn["state"] == "LISTEN":
+                count(stats["listening_ports"], conn["local_port"])
+                
+            # Count remote connections
+            if conn["state"] == "ESTABLISHED" and conn["remote_addr"]:
+                count(stats["remote_connections"], f"{conn['remote_addr']}:{conn['remote_port']}")
+                
+            # Count connection states
+            count(stats["connection_states"], conn["state"] or "UNKNOWN")
+            
+            # Count protocols
+            count(stats["protocols"], conn["protocol"])
+            
+    def _compact_connections(self) -> None:
+        """Trim the connection history log to the most recent scans"""
+        from collections import deque
+        
+        with open(self.connections_file, 'r', encoding='utf-8') as f:
+            lines = deque(f, maxlen=self.MAX_HISTORY_SCANS)
+            
+        tmp_path = f"{self.connections_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.connections_file)
+        self._history_lines = len(lines)
+        
+    def _load_connections(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load the most recent scans from the connection history log"""
+        from collections import deque
+        
+        try:
+            with open(self.connections_file, 'r', encoding='utf-8') as f:
+                lines = deque(f, maxlen=self.MAX_HISTORY_SCANS)
+        except FileNotFoundError:
+            return {}
+            
+        history = {}
+        for line in lines:
+            try:
+                scan = json.loads(line)
+            except json.JSONDecodeError:
+                # Skip a line left partial by an interrupted write
+                continue
+            history[scan["timestamp"]] = scan["connections"]
+            
+        return history
+        
+    def _find_unusual_connections(self, connections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Find unusual connections based on history and known patterns"""
+        unusual = []
+        
+        for conn in connections:
+            is_unusual = False
+            reason = ""
+            
+            # Check for non-standard ports
+            if (conn["state"] == "LISTEN" and 
+                conn["local_port"] not in self.COMMON_PORTS and
+                conn["local_port"] not in self._known_ports):
+                is_unusual = True
+                reason = f"Unusual listening port: {conn['local_port']}"
+                
+            # Check for suspicious remote addresses
+            elif (conn["state"] == "ESTABLISHED" and
+                 conn["remote_addr"] not in self._known_addrs):
+                # Check for private IP ranges
+                if not conn["remote_addr"].startswith(self.PRIVATE_ADDR_PREFIXES):
+                    is_unusual = True
+                    reason = f"Connection to external IP: {conn['remote_addr']}"
+                    
+            if is_unusual:
+                unusual_conn = dict(conn)
+                unusual_conn["reason"] = reason
+                unusual.append(unusual_conn)
+                
+                # Record the unusual connection
+                self._save_unusual_connection(unusual_conn)
+                
+        # Write the file once for the whole scan
+        if unusual:
+            self._flush_unusual_connections()
+            
+        return unusual
+        
+    def _save_unusual_connection(self, connection: Dict[str, Any]) -> None:
+        """Record an unusual connection in memory"""
+        unusual = self._unusual
+        
+        # Add new unusual connection
+        timestamp = datetime.now().isoformat()
+        
+        # Use connection details as key to avoid duplicates
+        key = f"{connection['protocol']}_{connection['local_addr']}:{connection['local_port']}"
+        key += f"_{connection['remote_addr']}:{connection['remote_port']}"
+        
+        unusual[key] = {
+            "connection": connection,
+            "first_seen": unusual.get(key, {}).get("first_seen", timestamp),
+            "last_seen": timestamp,
+            "count": unusual.get(key, {}).get("count", 0) + 1
+        }
+        
+    def _flush_unusual_connections(self) -> None:
+        """Write the unusual connections to file"""
+        tmp_path = f"{self.unusual_connections_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(_encode_json(self._unusual))
+        os.replace(tmp_path, self.unusual_connections_file)
+        
+    def _analyze_connections(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze connection patterns"""
+        try:
+            unusual = self._unusual
+            
+            # The counts are kept up to date as scans are saved
+            stats = self._get_stats()
+            
+            # Sort by frequency
+            connection_stats = {
+                "total_scans": stats["total_scans"],
+                "listening_ports": dict(
+                    sorted(stats["listening_ports"].items(),
+                          key=lambda x: x[1], reverse=True)
+                ),
+                "remote_connections": dict(
+                    sorted(stats["remote_connections"].items(),
+                          key=lambda x: x[1], reverse=True)
+                ),
+                "connection_states": dict(stats["connection_states"]),
+                "protocols": dict(stats["protocols"])
+            }
+            
+            # Get top 10 unusual connections
+            unusual_list = []
+            for key, details in unusual.items():
+                unusual_list.append({
+                    "connection": details["connection"],
+                    "first_seen": details["first_seen"],
+                    "last_seen": details["last_seen"],
+                    "count": details["count"]
+                })
+                
+            # Sort by count
+            unusual_list.sort(key=lambda x: x["count"], reverse=True)
+            
+            return {
+                "success": True,
+                "message": "Connection analysis completed",
+                "stats": connection_stats,
+                "unusual_connections": unusual_list[:10],
+                "total_unusual": len(unusual)
+            }
+        except Exception as e:
+            self.logger.error(f"Error analyzing connections: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error analyzing connections: {str(e)}"
+            }
+            
+    def _connection_history(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get connection history"""
+        import bisect
+        
+        try:
+            # Load connection history
+            history = self._load_connections()
+            
+            # Get requested timespan
+            hours = int(params.get("hours", 24))
+            cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
+            
+            # Filter by timespan; the log is appended in time order, so the
+            # first scan inside the window can be binary-searched
+            timestamps = list(history)
+            start = bisect.bisect_left(timestamps, cutoff)
+            filtered_history = {timestamp: history[timestamp] for timestamp in timestamps[start:]}
+            
+            return {
+                "success": True,
+                "message": f"Retrieved connection history for the last {hours} hours",
+                "history": filtered_history,
+                "scan_count": len(filtered_history),
+                "connection_count": sum(len(c) for c in filtered_history.values())
+            }
+        except Exception as e:
+            self.logger.error(f"Error retrieving connection history: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error retrieving connection history: {str(e)}"
+            }
+            
+    def get_metadata(self) -> Dict[str, Any]:
+        """Return plugin metadata"""
+        return {
+            "name": "Network Monitor Plugin",
+            "version": "1.0.0",
+            "description": "Monitors network connections and detects unusual activity",
+            "author": "Claude",
+            "status": "active",
+            "config": self.config
+        }
+        
+    def cleanup(self) -> bool:
+        """Clean up any resources used by the plugin"""
+        self.logger.info("Network Monitor plugin cleanup")
+        return True
@@ -6,17 +6,158 @@ Provides functionality to backup and restore system configurations
 import os
 import sys
 import json
+import ctypes
+import errno
+import fcntl
+import stat
 import logging
 import subprocess
 import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Optional faster JSON backend for metadata files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Plugin base class - assuming this is imported from the plugin_system module
 from plugin_system import DeusPlugin
 
+def _parse_json(data):
+    """Parse JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _dump_json(obj, indent=None):
+    """Serialize obj to JSON bytes, compact unless indent is given"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    separators = None if indent else (",", ":")
+    return json.dumps(obj, indent=indent, separators=separators).encode()
+
+def _read_json(path):
+    """Parse a JSON file, using orjson when available"""
+    with open(path, "rb") as f:
+        return _parse_json(f.read())
+
+def _atomic_write_json(path, obj, indent=None):
+    """Write JSON to path atomically (temp file in the same directory + os.replace)"""
+    _atomic_write_bytes(path, _dump_json(obj, indent))
+
+def _atomic_write_bytes(path, data):
+    """Write bytes to path atomically (temp file in the same directory + os.replace)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)  # mkstemp creates files as 0600
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+# FICLONE ioctl: share the source extents (reflink) on btrfs/XFS
+_FICLONE = 0x40049409
+_COPY_CHUNK = 1 << 24
+# copy_file_range errors meaning "not supported here", not a failed copy
+_COPY_FALLBACK_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP}
+
+def _clone_file(src, dst, size):
+    """Copy size bytes of file data inside the kernel, returning False when unsupported"""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        try:
+            fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+            return True
+        except OSError:
+            pass
+        if not hasattr(os, "copy_file_range"):
+            return False
+        # Bounded by the stat size, so a small file takes a single call instead
+        # of one copy plus one more to hit end of file
+        copied = 0
+        try:
+            while copied < size:
+                n = os.copy_file_range(src_fd, dst_fd, min(size - copied, _COPY_CHUNK))
+                if not n:
+                    break  # Truncated while copying
+                copied += n
+            return True
+        except OSError as e:
+            if copied or e.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+            return False
+
+def _fast_copy(src, dst, *, follow_symlinks=True):
+    """Drop-in for shutil.copy2 that avoids user-space buffers for regular files"""
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    src_st = os.stat(src, follow_symlinks=follow_symlinks)
+    if not stat.S_ISREG(src_st.st_mode):
+        return shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+    if not _clone_file(src, dst, src_st.st_size):
+        # shutil.copyfile uses sendfile, then falls back to read/write
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+# renameat2() flag swapping two existing paths in one atomic step (Linux 3.15+)
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+_renameat2 = getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)  # glibc 2.28+
+if _renameat2 is not None:
+    _renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+
+def _exchange_paths(a, b):
+    """Atomically swap two paths, returning False when the platform can't"""
+    if _renameat2 is None:
+        return False
+    return _renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE) == 0
+
+def _link_dest_copy(source_root, link_root):
+    """
+    Build a copytree copy_function that hardlinks files unchanged since the
+    previous snapshot (same size, mtime and mode, as rsync --link-dest does)
+    """
+    def copy(src, dst, *, follow_symlinks=True):
+        previous = os.path.join(link_root, os.path.relpath(src, source_root))
+        try:
+            src_st = os.stat(src, follow_symlinks=follow_symlinks)
+            prev_st = os.lstat(previous)
+            if (stat.S_ISREG(src_st.st_mode)
+                    and src_st.st_mode == prev_st.st_mode
+                    and src_st.st_size == prev_st.st_size
+                    and src_st.st_mtime_ns == prev_st.st_mtime_ns):
+                os.link(previous, dst)
+                return dst
+        except OSError:
+            pass
+        return _fast_copy(src, dst, follow_symlinks=follow_symlinks)
+    return copy
+
 class BackupRestorePlugin(DeusPlugin):
     """Plugin for system backup and restore operations"""
     
+    # Compression level for archive backups when zstd is installed
+    ZSTD_LEVEL = 3
+    
+    # Append-only log of backup metadata, one JSON object per line
+    INDEX_FILE = "index.jsonl"
+    
+    # Directories backed up when none are specified
+    DEFAULT_DIRECTORIES = (
+        "/opt/deus-ex-machina/config",
+        "/opt/deus-ex-machina/plugins",
+        "/opt/deus-ex-machina/var/db"
+    )
+    DEFAULT_DIR_NAMES = tuple(os.path.basename(d) for d in DEFAULT_DIRECTORIES)
+    
     def __init__(self):
         super().__init__(
             name="backup_restore",
@@ -26,6 +167,10 @@ class BackupRestorePlugin(DeusPlugin):
         )
         self.backup_dir = "/opt/deus-ex-machina/backups"
         
+        # list_backups() results, valid while the backup directory's mtime is unchanged
+        self._backup_cache = None
+        self._backup_cache_mtime = 0
+        
         # Ensure backup directory exists
         os.makedirs(self.backup_dir, exist_ok=True)
     
@@ -39,7 +184,9 @@ class BackupRestorePlugin(DeusPlugin):
         params = params or {}
         
         if action == "backup":
-            return self.create_backup(params.get("name", "manual"), params.get("directories", []))
+            return self.create_backup(params.get("name", "manual"), params.get("directories", []),
+                                      params.get("archive", False),
+                                      params.get("write_metadata", True))
             
         elif action == "restore":
             return self.restore_backup(params.get("backup_id"))
@@ -47,49 +194,93 @@ class BackupRestorePlugin(DeusPlugin):
         elif action == "list_backups":
             return self.list_backups()
             
+        elif action == "prune_backups":
+            return self.prune_backups(params.get("keep", 10))
+            
         else:
             return {"success": False, "message": f"Unknown action: {action}"}
     
-    def create_backup(self, name, directories=None):
-        """Create a backup of the specified directories"""
+    def create_backup(self, name, directories=None, archive=False, write_metadata=True):
+        """
+        Create a backup of the specified directories, optionally as one compressed archive
+        
+        The metadata is always recorded in the backup index; write_metadata=False
+        skips the per-backup metadata.json copy of it
+        """
         try:
             # Default directories to backup if none specified
             if not directories:
-                directories = [
-                    "/opt/deus-ex-machina/config",
-                    "/opt/deus-ex-machina/plugins",
-                    "/opt/deus-ex-machina/var/db"
-                ]
+                directories = list(self.DEFAULT_DIRECTORIES)
+                dir_names = self.DEFAULT_DIR_NAMES
+            else:
+                dir_names = [os.path.basename(directory) for directory in directories]
             
             # Create a timestamped backup ID
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_id = f"{timestamp}_{name}"
             backup_path = os.path.join(self.backup_dir, backup_id)
             
-            # Create the backup directory
-            os.makedirs(backup_path, exist_ok=True)
+            # Files unchanged since the newest backup are hardlinked to it
+            # instead of copied again; directories without metadata may be
+            # half-written, so they never serve as the parent
+            parent_id = None
+            incremental = False
+            if not archive:
+                previous = [
+                    b for b in self.list_backups().get("backups", [])
+                    if not b.get("archive") and b.get("timestamp") != "unknown"
+                ]
+                if previous:
+                    parent_id = previous[0]["backup_id"]
+                    incremental = True
+            
+            # Create the backup directory, never reusing one: its files may be
+            # hardlinked into older backups, which writing into it would change
+            try:
+                os.makedirs(backup_path)
+            except FileExistsError:
+                return {
+                    "success": False,
+                    "message": f"Backup already exists: {backup_id}"
+                }
             
             # Backup each directory
-            for directory in directories:
+            copies = []
+            for directory, dir_name in zip(directories, dir_names):
                 if os.path.exists(directory):
-                    dir_name = os.path.basename(directory)
-                    dest_path = os.path.join(backup_path, dir_name)
-                    shutil.copytree(directory, dest_path)
-                    self.logger.info(f"Backed up {directory} to {dest_path}")
+                    link_dest = os.path.join(self.backup_dir, parent_id, dir_name) if parent_id else None
+                    copies.append((directory, os.path.join(backup_path, dir_name), link_dest))
                 else:
                     self.logger.warning(f"Directory not found: {directory}")
             
+            archive_name = None
+            if archive:
+                # Pack everything into one sequential stream instead of file copies
+                archive_name = self._archive_directories([copy[0] for copy in copies], backup_path)
+            elif copies:
+                # The trees are independent, so copy several at once
+                with ThreadPoolExecutor(max_workers=min(4, len(copies))) as executor:
+                    list(executor.map(lambda copy: self._copy_directory(*copy), copies))
+            
             # Create a metadata file
             metadata = {
                 "backup_id": backup_id,
                 "name": name,
                 "timestamp": timestamp,
                 "directories": directories,
+                "parent": parent_id,
+                "incremental": incremental,
+                "archive": archive_name,
+                "archived_directories": [copy[0] for copy in copies] if archive_name else [],
                 "created_by": "Deus Ex Machina"
             }
             
-            with open(os.path.join(backup_path, "metadata.json"), "w") as f:
-                json.dump(metadata, f, indent=2)
+            if write_metadata:
+                _atomic_write_json(os.path.join(backup_path, "metadata.json"), metadata)
+            self._append_index([metadata])
+            
+            # The listing may have been cached before the metadata was written
+            self._backup_cache = None
             
             return {
                 "success": True,
@@ -117,14 +308,23 @@ class BackupRestorePlugin(DeusPlugin):
             
             # Read metadata to determine what to restore
             metadata_file = os.path.join(backup_path, "metadata.json")
-            if not os.path.exists(metadata_file):
+            if os.path.exists(metadata_file):
+                metadata = _read_json(metadata_file)
+            else:
+                metadata = self._load_index().get(backup_id)
+            if metadata is None:
                 return {
                     "success": False,
                     "message": f"Invalid backup (no metadata): {backup_id}"
                 }
             
-            with open(metadata_file, "r") as f:
-                metadata = json.load(f)
+            if metadata.get("archive"):
+                restored_dirs = self._restore_archive(backup_path, metadata)
+                return {
+                    "success": True,
+                    "restored_directories": restored_dirs,
+                    "message": f"Restored {len(restored_dirs)} directories from backup {backup_id}"
+                }
             
             # Restore each directory
             restored_dirs = []
@@ -133,14 +333,37 @@ class BackupRestorePlugin(DeusPlugin):
                 source_path = os.path.join(backup_path, dir_name)
                 
                 if os.path.exists(source_path):
-                    # Create a backup of the current directory before restoring
-                    if os.path.exists(directory):
-                        temp_backup = f"{directory}.bak.{int(datetime.now().timestamp())}"
-                        shutil.move(directory, temp_backup)
-                        self.logger.info(f"Created temporary backup: {temp_backup}")
+                    temp_backup = f"{directory}.bak.{int(datetime.now().timestamp())}"
                     
-                    # Restore from backup
-                    shutil.copytree(source_path, directory)
+                    if shutil.which("rsync"):
+                        # Sync in place so only changed files are written; the
+                        # files it replaces or deletes are kept in temp_backup
+                        os.makedirs(directory, exist_ok=True)
+                        subprocess.run(
+                            ["rsync", "-a", "--delete", "--backup", f"--backup-dir={temp_backup}",
+                             f"{source_path}/", f"{directory}/"],
+                            capture_output=True, text=True, check=True
+                        )
+                        self.logger.info(f"Replaced files saved to temporary backup: {temp_backup}")
+                    else:
+                        # Stage the restore next to the directory (same filesystem),
+                        # then swap it in so the directory never goes missing
+                        staging = f"{directory}.restore.tmp"
+                        if os.path.lexists(staging):
+                            shutil.rmtree(staging)
+                        shutil.copytree(source_path, staging, copy_function=_fast_copy)
+                        
+                        if (os.path.isdir(directory) and not os.path.islink(directory)
+                                and _exchange_paths(directory, staging)):
+                            # The staging path now holds the previous contents
+                            os.rename(staging, temp_backup)
+                            self.logger.info(f"Created temporary backup: {temp_backup}")
+                        else:
+                            # Create a backup of the current directory before restoring
+                            if os.path.exists(directory):
+                                shutil.move(directory, temp_backup)
+                                self.logger.info(f"Created temporary backup: {temp_backup}")
+                            os.rename(staging, directory)
                     self.logger.info(f"Restored {directory} from backup")
                     restored_dirs.append(directory)
                 else:
@@ -159,36 +382,167 @@ class BackupRestorePlugin(DeusPlugin):
                 "message": f"Restore failed: {str(e)}"
             }
     
+    def _copy_directory(self, directory, dest_path, link_dest=None):
+        """Copy a directory tree into a backup, using rsync when available"""
+        if shutil.which("rsync"):
+            if link_dest and os.path.isdir(link_dest):
+                # Files hardlinked to the parent snapshot must be replaced,
+                # never rewritten in place
+                command = ["rsync", "-a", "--delete", f"--link-dest={link_dest}"]
+            else:
+                command = ["rsync", "-a", "--inplace", "--delete"]
+            subprocess.run(
+                command + [f"{directory}/", f"{dest_path}/"],
+                capture_output=True, text=True, check=True
+            )
+        elif link_dest and os.path.isdir(link_dest):
+            shutil.copytree(directory, dest_path,
+                            copy_function=_link_dest_copy(directory, link_dest))
+        else:
+            shutil.copytree(directory, dest_path, copy_function=_fast_copy)
+        self.logger.info(f"Backed up {directory} to {dest_path}")
+    
+    def _archive_directories(self, directories, backup_path):
+        """Write directories into a single compressed tar archive, returning its name"""
+        if shutil.which("zstd"):
+            archive_name = "data.tar.zst"
+            compress = [f"--use-compress-program=zstd -{self.ZSTD_LEVEL} -T0"]
+        else:
+            archive_name = "data.tar.gz"
+            compress = ["-z"]
+        
+        # Members are stored relative to / so a restore extracts them in place
+        members = [os.path.relpath(os.path.abspath(d), "/") for d in directories]
+        if members:
+            subprocess.run(
+                ["tar", "-cf", os.path.join(backup_path, archive_name), *compress, "-C", "/", *members],
+                capture_output=True, text=True, check=True
+            )
+            self.logger.info(f"Archived {len(members)} directories to {archive_name}")
+        return archive_name
+    
+    def _restore_archive(self, backup_path, metadata):
+        """Restore the directories of an archive backup with one tar extraction"""
+        archived = set(metadata.get("archived_directories", []))
+        
+        restore_dirs = []
+        for directory in metadata["directories"]:
+            if directory not in archived:
+                self.logger.warning(f"Directory not found in backup: {os.path.basename(directory)}")
+                continue
+            
+            # Create a backup of the current directory before restoring
+            if os.path.exists(directory):
+                temp_backup = f"{directory}.bak.{int(datetime.now().timestamp())}"
+                shutil.move(directory, temp_backup)
+                self.logger.info(f"Created temporary backup: {temp_backup}")
+            restore_dirs.append(directory)
+        
+        if restore_dirs:
+            # tar detects the compression when reading
+            subprocess.run(
+                ["tar", "-xf", os.path.join(backup_path, metadata["archive"]), "-C", "/",
+                 *[os.path.relpath(os.path.abspath(d), "/") for d in restore_dirs]],
+                capture_output=True, text=True, check=True
+            )
+            for directory in restore_dirs:
+                self.logger.info(f"Restored {directory} from backup")
+        return restore_dirs
+    
+    def _load_index(self):
+        """Return {backup_id: metadata} from the backup index"""
+        index = {}
+        try:
+            with open(os.path.join(self.backup_dir, self.INDEX_FILE), "rb") as f:
+                for line in f:
+                    try:
+                        metadata = _parse_json(line)
+                    except ValueError:
+                        continue  # Torn last line from an interrupted append
+                    index[metadata["backup_id"]] = metadata
+        except FileNotFoundError:
+            pass
+        return index
+    
+    def _append_index(self, entries):
+        """Append metadata records to the backup index"""
+        with open(os.path.join(self.backup_dir, self.INDEX_FILE), "a+b") as f:
+            data = b"".join(_dump_json(metadata) + b"\n" for metadata in entries)
+            # Start on a fresh line if an earlier append was cut short
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _rewrite_index(self, entries):
+        """Replace the backup index with the given metadata records"""
+        _atomic_write_bytes(
+            os.path.join(self.backup_dir, self.INDEX_FILE),
+            b"".join(_dump_json(metadata) + b"\n" for metadata in entries)
+        )
+    
+    def _read_meta(self, entry):
+        """Read the metadata of one backup directory entry, None if it has none"""
+        try:
+            return _read_json(os.path.join(entry.path, "metadata.json"))
+        except FileNotFoundError:
+            return None
+    
     def list_backups(self):
         """List all available backups"""
         try:
-            backups = []
+            # Backups only appear or disappear as entries of backup_dir
+            dir_mtime = os.stat(self.backup_dir).st_mtime_ns
+            if self._backup_cache is not None and dir_mtime == self._backup_cache_mtime:
+                return {
+                    "success": True,
+                    "backups": list(self._backup_cache),
+                    "count": len(self._backup_cache)
+                }
+            
+            with os.scandir(self.backup_dir) as it:
+                entries = [entry for entry in it if entry.is_dir()]
             
-            for item in os.listdir(self.backup_dir):
-                item_path = os.path.join(self.backup_dir, item)
+            # Indexed backups need no per-directory reads; the rest (older
+            # backups, or a missing index) are scanned and added to the index
+            index = self._load_index()
+            backups = [index[entry.name] for entry in entries if entry.name in index]
+            unindexed = [entry for entry in entries if entry.name not in index]
+            
+            if unindexed:
+                with ThreadPoolExecutor(max_workers=min(8, len(unindexed))) as executor:
+                    scanned = list(executor.map(self._read_meta, unindexed))
                 
-                if os.path.isdir(item_path):
-                    # Try to read metadata
-                    metadata_file = os.path.join(item_path, "metadata.json")
-                    if os.path.exists(metadata_file):
-                        with open(metadata_file, "r") as f:
-                            metadata = json.load(f)
-                        backups.append(metadata)
-                    else:
+                found = [metadata for metadata in scanned if metadata is not None]
+                if found:
+                    try:
+                        self._append_index(found)
+                    except OSError as e:
+                        self.logger.warning(f"Could not update backup index: {str(e)}")
+                
+                for entry, metadata in zip(unindexed, scanned):
+                    if metadata is None:
                         # Basic info if no metadata
-                        backups.append({
-                            "backup_id": item,
+                        metadata = {
+                            "backup_id": entry.name,
                             "name": "unknown",
                             "timestamp": "unknown",
                             "directories": []
-                        })
+                        }
+                    backups.append(metadata)
             
             # Sort by timestamp (newest first)
             backups.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
             
+            self._backup_cache = backups
+            self._backup_cache_mtime = dir_mtime
+            
             return {
                 "success": True,
-                "backups": backups,
+                "backups": list(backups),
                 "count": len(backups)
             }
             
@@ -198,6 +552,40 @@ class BackupRestorePlugin(DeusPlugin):
                 "success": False,
                 "message": f"Failed to list backups: {str(e)}"
             }
+    
+    def prune_backups(self, keep=10):
+        """Delete all but the newest backups"""
+        try:
+            listing = self.list_backups()
+            if not listing["success"]:
+                return listing
+            
+            # Hardlinked files shared with the kept backups stay on disk, so
+            # only data unique to the pruned backups is freed
+            removed = []
+            for backup in listing["backups"][max(int(keep), 0):]:
+                shutil.rmtree(os.path.join(self.backup_dir, backup["backup_id"]))
+                removed.append(backup["backup_id"])
+            self._backup_cache = None
+            
+            if removed:
+                index = self._load_index()
+                for backup_id in removed:
+                    index.pop(backup_id, None)
+                self._rewrite_index(index.values())
+            
+            return {
+                "success": True,
+                "removed": removed,
+                "message": f"Removed {len(removed)} old backups"
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Error pruning backups: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Failed to prune backups: {str(e)}"
+            }
 
 # Plugin factory function - required for dynamic loading
 def get_plugin():
@@ -5,19 +5,98 @@ Provides extended network monitoring capabilities
 """
 import os
 import sys
+import asyncio
 import json
 import logging
+import re
+import shutil
 import subprocess
+import tempfile
 import socket
-import time
+import struct
 import threading
 from datetime import datetime
 
 # Plugin base class - assuming this is imported from the plugin_system module
 from plugin_system import DeusPlugin
 
+# One "host : latency" (or "host : -" when unreachable) line of fping -C output
+_FPING_RESULT_RE = re.compile(rb'^(\S+)\s*:\s*([\d.]+|-)', re.MULTILINE)
+
+# Round-trip time in ping output
+_PING_TIME_RE = re.compile(rb"time=(\d+\.\d+) ms")
+
+# Upper bound on ping processes running at the same time
+_MAX_CONCURRENT_PINGS = 64
+
+# Kernel socket tables per protocol, and the hex states used below
+_PROC_NET_FILES = {
+    "tcp": ("/proc/net/tcp", "/proc/net/tcp6"),
+    "udp": ("/proc/net/udp", "/proc/net/udp6")
+}
+_STATE_ESTABLISHED = "01"
+_STATE_UNCONNECTED = "07"
+_STATE_LISTEN = "0A"
+
+def _atomic_write_json(path, obj, indent=None):
+    """Write JSON to path atomically (temp file in the same directory + os.replace)"""
+    separators = None if indent else (",", ":")
+    data = json.dumps(obj, indent=indent, separators=separators).encode()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)  # mkstemp creates files as 0600
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _decode_proc_address(address):
+    """Decode a /proc/net "HEXADDR:HEXPORT" field into (ip, port)"""
+    addr_hex, port_hex = address.split(":")
+    # Each 32-bit word is stored in host (little-endian) order
+    packed = b"".join(
+        struct.pack("<I", int(addr_hex[i:i + 8], 16)) for i in range(0, len(addr_hex), 8)
+    )
+    family = socket.AF_INET if len(packed) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, packed), int(port_hex, 16)
+
+def _read_proc_net(protocol):
+    """Yield (local_address, remote_address, state) for every socket of a protocol"""
+    for path in _PROC_NET_FILES[protocol]:
+        try:
+            with open(path, "r") as f:
+                lines = f.readlines()[1:]  # Skip header
+        except OSError:
+            continue
+        
+        for line in lines:
+            parts = line.split()
+            if len(parts) >= 4:
+                yield _decode_proc_address(parts[1]), _decode_proc_address(parts[2]), parts[3]
+
+def _format_address(ip, port):
+    """Format an address the way ss prints it"""
+    return f"[{ip}]:{port}" if ":" in ip else f"{ip}:{port}"
+
 class NetworkMonitorPlugin(DeusPlugin):
-    """Plugin for advanced network monitoring"""
+    """
+    Plugin for advanced network monitoring
+    
+    The monitoring thread is the only writer of self.metrics and replaces it
+    with a fully built dict in a single rebind; readers on other threads
+    take a reference once and never see a half-updated snapshot. The same
+    holds for self.endpoints readers, which iterate over a copied snapshot.
+    """
+    
+    # Endpoints monitored when none are configured, besides the default gateway
+    DEFAULT_ENDPOINTS = (
+        ("DNS Server", "8.8.8.8"),
+        ("Internet", "www.google.com")
+    )
     
     def __init__(self):
         super().__init__(
@@ -28,9 +107,12 @@ class NetworkMonitorPlugin(DeusPlugin):
         )
         self.running = False
         self.monitor_thread = None
+        self._stop_event = threading.Event()
         self.monitoring_interval = 300  # seconds
-        self.endpoints = []
+        self.endpoints = {}  # name -> address
         self.metrics = {}
+        # Open ports and endpoint reachability seen by the last anomaly check
+        self._last_signature = None
     
     def initialize(self):
         """Initialize the plugin"""
@@ -42,15 +124,14 @@ class NetworkMonitorPlugin(DeusPlugin):
                     config = json.load(f)
                 
                 self.monitoring_interval = config.get("interval", 300)
-                self.endpoints = config.get("endpoints", [])
+                self.endpoints = {
+                    e["name"]: e["address"] for e in config.get("endpoints", [])
+                }
             
             # Add default endpoints if none specified
             if not self.endpoints:
-                self.endpoints = [
-                    {"name": "Default Gateway", "address": self._get_default_gateway()},
-                    {"name": "DNS Server", "address": "8.8.8.8"},
-                    {"name": "Internet", "address": "www.google.com"}
-                ]
+                self.endpoints = {"Default Gateway": self._get_default_gateway()}
+                self.endpoints.update(self.DEFAULT_ENDPOINTS)
             
             self.logger.info("Network monitor plugin initialized with %d endpoints", 
                              len(self.endpoints))
@@ -91,6 +172,8 @@ class NetworkMonitorPlugin(DeusPlugin):
             return {"success": False, "message": "Monitoring already running"}
         
         self.running = True
+        self._stop_event.clear()
+        self._last_signature = None
         self.monitor_thread = threading.Thread(target=self._monitoring_loop)
         self.monitor_thread.daemon = True
         self.monitor_thread.start()
@@ -108,6 +191,7 @@ class NetworkMonitorPlugin(DeusPlugin):
             return {"success": False, "message": "Monitoring not running"}
         
         self.running = False
+        self._stop_event.set()  # Wake the loop instead of waiting out its sleep
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         
@@ -133,14 +217,14 @@ class NetworkMonitorPlugin(DeusPlugin):
             }
         
         # Check if endpoint already exists
-        if any(e["name"] == name for e in self.endpoints):
+        if name in self.endpoints:
             return {
                 "success": False,
                 "message": f"Endpoint '{name}' already exists"
             }
         
         # Add the new endpoint
-        self.endpoints.append({"name": name, "address": address})
+        self.endpoints[name] = address
         
         # Save configuration
         self._save_config()
@@ -153,10 +237,8 @@ class NetworkMonitorPlugin(DeusPlugin):
     
     def remove_endpoint(self, name):
         """Remove an endpoint from monitoring"""
-        initial_count = len(self.endpoints)
-        self.endpoints = [e for e in self.endpoints if e["name"] != name]
-        
-        if len(self.endpoints) < initial_count:
+        if name in self.endpoints:
+            del self.endpoints[name]
             # Save configuration
             self._save_config()
             
@@ -187,12 +269,13 @@ class NetworkMonitorPlugin(DeusPlugin):
                 "timestamp": datetime.now().isoformat()
             }
         else:
-            # Check all endpoints
+            # Check all endpoints, pinging them in one batch
+            # Snapshot the endpoints so add/remove calls can't change them mid-check
+            endpoints = list(self.endpoints.items())
+            latencies = self._ping_hosts([addr for _, addr in endpoints])
             results = {}
-            for endpoint in self.endpoints:
-                name = endpoint["name"]
-                addr = endpoint["address"]
-                latency = self._ping_host(addr)
+            for name, addr in endpoints:
+                latency = latencies.get(addr)
                 results[name] = {
                     "address": addr,
                     "reachable": latency is not None,
@@ -216,25 +299,46 @@ class NetworkMonitorPlugin(DeusPlugin):
                 active_connections = self._get_active_connections()
                 connectivity = self.check_connectivity()
                 
-                # Update metrics store
+                endpoints = connectivity.get("endpoints", {})
+                
+                # Update metrics store with one rebind of a complete dict
                 self.metrics = {
                     "open_ports": open_ports,
                     "active_connections": active_connections,
-                    "connectivity": connectivity.get("endpoints", {}),
+                    "connectivity": endpoints,
                     "timestamp": datetime.now().isoformat()
                 }
                 
-                # Look for anomalies
-                self._check_for_anomalies()
+                # Look for anomalies, unless nothing they depend on has changed;
+                # endpoint names are part of the signature, so adding or removing
+                # an endpoint also triggers a check
+                signature = (
+                    tuple(sorted((p["port"], p["protocol"]) for p in open_ports)),
+                    tuple(sorted((name, data["reachable"]) for name, data in endpoints.items()))
+                )
+                if signature != self._last_signature:
+                    self._last_signature = signature
+                    self._check_for_anomalies()
                 
             except Exception as e:
                 self.logger.error(f"Error in network monitoring: {str(e)}")
             
-            # Sleep for the monitoring interval
-            time.sleep(self.monitoring_interval)
+            # Sleep for the monitoring interval, or until monitoring is stopped
+            if self._stop_event.wait(self.monitoring_interval):
+                break
     
     def _get_default_gateway(self):
         """Get the default gateway IP address"""
+        try:
+            # Read the routing table directly; the default route has destination 0
+            with open("/proc/net/route", "r") as f:
+                for line in f.readlines()[1:]:
+                    parts = line.split()
+                    if len(parts) >= 3 and parts[1] == "00000000" and parts[2] != "00000000":
+                        return socket.inet_ntoa(struct.pack("<I", int(parts[2], 16)))
+        except (OSError, ValueError):
+            pass
+        
         try:
             # Try to get default gateway
             result = subprocess.run(
@@ -256,56 +360,93 @@ class NetworkMonitorPlugin(DeusPlugin):
             self.logger.error(f"Error getting default gateway: {str(e)}")
             return "192.168.1.1"
     
+    def _ping_hosts(self, hosts):
+        """Ping several hosts, returning {host: latency in ms or None}"""
+        hosts = list(dict.fromkeys(hosts))
+        if not hosts:
+            return {}
+        
+        if shutil.which("fping"):
+            try:
+                # One fping process probes every host at once
+                result = subprocess.run(
+                    ["fping", "-C1", "-q", "-t", "2000", *hosts],
+                    capture_output=True
+                )
+                latencies = dict.fromkeys(hosts)
+                for host, latency in _FPING_RESULT_RE.findall(result.stderr):
+                    host = host.decode()
+                    if host in latencies and latency != b"-":
+                        latencies[host] = float(latency)
+                return latencies
+                
+            except Exception as e:
+                self.logger.error(f"Error running fping: {str(e)}")
+        
+        # Without fping, run the pings side by side so their timeouts overlap
+        return asyncio.run(self._ping_hosts_async(hosts))
+    
+    async def _ping_hosts_async(self, hosts):
+        """Ping hosts concurrently from one event loop, returning {host: latency}"""
+        limit = asyncio.Semaphore(_MAX_CONCURRENT_PINGS)
+        
+        async def ping(host):
+            async with limit:
+                return await self._ping_host_async(host)
+        
+        latencies = await asyncio.gather(*(ping(host) for host in hosts))
+        return dict(zip(hosts, latencies))
+    
+    async def _ping_host_async(self, host):
+        """Async variant of _ping_host using an asyncio subprocess"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ping", "-c", "1", "-W", "2", host,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            stdout, _ = await process.communicate()
+            return self._parse_ping_output(process.returncode, stdout)
+            
+        except Exception as e:
+            self.logger.error(f"Error pinging {host}: {str(e)}")
+            return None
+    
     def _ping_host(self, host):
         """Ping a host and return latency in milliseconds, or None if unreachable"""
         try:
             # Use ping command to check connectivity
             result = subprocess.run(
                 ["ping", "-c", "1", "-W", "2", host],
-                capture_output=True, text=True
+                capture_output=True
             )
             
-            if result.returncode == 0:
-                # Parse output for latency
-                output = result.stdout
-                time_match = re.search(r"time=(\d+\.\d+) ms", output)
-                if time_match:
-                    return float(time_match.group(1))
-                return 0  # Reachable but couldn't parse time
-            
-            return None  # Unreachable
+            return self._parse_ping_output(result.returncode, result.stdout)
             
         except Exception as e:
             self.logger.error(f"Error pinging {host}: {str(e)}")
             return None
     
+    def _parse_ping_output(self, returncode, stdout):
+        """Return the latency from ping output, 0 if unparsable, None if unreachable"""
+        if returncode == 0:
+            # Parse output for latency (raw bytes, no decoding needed)
+            time_match = _PING_TIME_RE.search(stdout)
+            if time_match:
+                return float(time_match.group(1))
+            return 0  # Reachable but couldn't parse time
+        
+        return None  # Unreachable
+    
     def _get_open_ports(self):
         """Get currently open network ports"""
         try:
-            # Use ss command to list listening ports
-            result = subprocess.run(
-                ["ss", "-tuln"],
-                capture_output=True, text=True, check=True
-            )
-            
+            # Listening TCP sockets and bound UDP sockets, as `ss -tuln` lists them
             ports = []
-            for line in result.stdout.split('\n')[1:]:  # Skip header
-                if not line.strip():
-                    continue
-                
-                parts = line.split()
-                if len(parts) >= 5:
-                    # Extract address:port
-                    local_address = parts[4]
-                    port_part = local_address.split(':')[-1]
-                    
-                    # Try to extract protocol and port
-                    try:
-                        port = int(port_part)
-                        protocol = "tcp" if "tcp" in parts[0].lower() else "udp"
-                        ports.append({"port": port, "protocol": protocol})
-                    except ValueError:
-                        pass
+            for protocol, state in (("tcp", _STATE_LISTEN), ("udp", _STATE_UNCONNECTED)):
+                for local, remote, socket_state in _read_proc_net(protocol):
+                    if socket_state == state:
+                        ports.append({"port": local[1], "protocol": protocol})
             
             return ports
             
@@ -316,29 +457,15 @@ class NetworkMonitorPlugin(DeusPlugin):
     def _get_active_connections(self):
         """Get active network connections"""
         try:
-            # Use ss command to list established connections
-            result = subprocess.run(
-                ["ss", "-tu", "state", "established"],
-                capture_output=True, text=True, check=True
-            )
-            
             connections = []
-            for line in result.stdout.split('\n')[1:]:  # Skip header
-                if not line.strip():
-                    continue
-                
-                parts = line.split()
-                if len(parts) >= 5:
-                    # Extract local and remote addresses
-                    local_address = parts[3]
-                    remote_address = parts[4]
-                    protocol = "tcp" if "tcp" in parts[0].lower() else "udp"
-                    
-                    connections.append({
-                        "protocol": protocol,
-                        "local": local_address,
-                        "remote": remote_address
-                    })
+            for protocol in ("tcp", "udp"):
+                for local, remote, state in _read_proc_net(protocol):
+                    if state == _STATE_ESTABLISHED:
+                        connections.append({
+                            "protocol": protocol,
+                            "local": _format_address(*local),
+                            "remote": _format_address(*remote)
+                        })
             
             return connections
             
@@ -352,9 +479,10 @@ class NetworkMonitorPlugin(DeusPlugin):
         # In a real implementation, this would analyze patterns and report issues
         
         # Simple check: count unreachable endpoints
-        if "connectivity" in self.metrics:
+        metrics = self.metrics
+        if "connectivity" in metrics:
             unreachable = [
-                name for name, data in self.metrics["connectivity"].items()
+                name for name, data in metrics["connectivity"].items()
                 if not data.get("reachable", False)
             ]
             
@@ -369,18 +497,18 @@ class NetworkMonitorPlugin(DeusPlugin):
             
             config = {
                 "interval": self.monitoring_interval,
-                "endpoints": self.endpoints
+                "endpoints": [
+                    {"name": name, "address": address}
+                    for name, address in self.endpoints.items()
+                ]
             }
             
-            with open(f"{config_dir}/network_monitor.json", "w") as f:
-                json.dump(config, f, indent=2)
+            # Stays indented since the config file is also edited by hand
+            _atomic_write_json(f"{config_dir}/network_monitor.json", config, indent=2)
                 
         except Exception as e:
             self.logger.error(f"Error saving config: {str(e)}")
 
-# Don't forget to import re module for _ping_host
-import re
-
 # Plugin factory function - required for dynamic loading
 def get_plugin():
     """Return an instance of the plugin"""
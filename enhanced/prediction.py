@@ -12,6 +12,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple, Union
 import math
 import random
+import time
+import warnings
+
+# Optional JIT compiler for the exponential smoothing kernel
+try:
+    import numba
+except ImportError:
+    numba = None
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -41,19 +49,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Prediction")
 
+# Smoothing factors tried by the exponential smoothing hold-out validation
+_ES_ALPHAS = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+
+def _es_grid_search(y, train_size, alphas):
+    """
+    Pick the smoothing factor with the lowest hold-out MSE and smooth the
+    full series with it, returning (best_alpha, final_level)
+    """
+    n = len(y)
+    best_alpha = 0.3  # Default
+    best_error = np.inf
+    
+    if train_size >= 10:  # Only validate if we have enough data
+        for alpha in alphas:
+            # One-step-ahead smoothing over the training part
+            level = y[0]
+            for i in range(1, train_size):
+                level = alpha * y[i] + (1 - alpha) * level
+                
+            # The forecast stays flat over the test part
+            error = 0.0
+            for i in range(train_size, n):
+                diff = level - y[i]
+                error += diff * diff
+            mse = error / (n - train_size)
+            
+            if mse < best_error:
+                best_error = mse
+                best_alpha = alpha
+                
+    # Apply exponential smoothing with best alpha
+    level = y[0]
+    for i in range(1, n):
+        level = best_alpha * y[i] + (1 - best_alpha) * level
+        
+    return best_alpha, level
+
+if numba is not None:
+    _es_grid_search = numba.njit(cache=True)(_es_grid_search)
+
 class PredictionEngine:
     """Forecasting and pattern recognition engine"""
     
+    # Seconds a fetched metric history is reused by later forecasts and pattern scans
+    HISTORY_CACHE_TTL = 300
+    
     def __init__(self, memory: Optional[DeusMemory] = None):
         """Initialize with an optional memory instance"""
         self.memory = memory or DeusMemory()
+        # (metric_name, days) -> (fetch time, history)
+        self._history_cache: Dict[Tuple[str, int], Tuple[float, List[Tuple[str, float]]]] = {}
+        
+    def _get_metric_history(self, metric_name: str, days: int) -> List[Tuple[str, float]]:
+        """Fetch a metric's history, reusing a copy fetched within HISTORY_CACHE_TTL"""
+        key = (metric_name, days)
+        now = time.monotonic()
+        cached = self._history_cache.get(key)
+        if cached is not None and now - cached[0] < self.HISTORY_CACHE_TTL:
+            return cached[1]
+            
+        history = self.memory.get_metric_history(metric_name, days=days)
+        
+        # Drop expired entries, and don't cache empty results (fetch errors also return [])
+        self._history_cache = {
+            k: v for k, v in self._history_cache.items()
+            if now - v[0] < self.HISTORY_CACHE_TTL
+        }
+        if history:
+            self._history_cache[key] = (now, history)
+        return history
         
     def forecast_metric(self, metric_name: str, hours_ahead: int = 24, 
                        history_days: int = 7) -> Dict[str, Any]:
         """Forecast a metric value for specified hours in the future"""
         try:
             # Get historical data from memory system
-            history = self.memory.get_metric_history(metric_name, days=history_days)
+            history = self._get_metric_history(metric_name, history_days)
             
             if not history or len(history) < 24:  # Need at least a day of data
                 return {
@@ -64,31 +136,11 @@ class PredictionEngine:
                     "available_points": len(history) if history else 0
                 }
                 
-            # Extract values and timestamps
-            timestamps = []
-            values = []
-            
-            for ts, val in history:
-                try:
-                    # Convert timestamp to datetime
-                    if 'T' in ts:  # ISO format
-                        dt = datetime.fromisoformat(ts)
-                    else:  # Legacy format
-                        dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
+            # Extract values and timestamps (hours since the first timestamp)
+            times, values = self._parse_history(history, warn=True)
+            timestamps = self._hours_since_start(times)
                     
-                    # Get hours since first timestamp or total hours
-                    if not timestamps:
-                        base_time = dt
-                        x = 0
-                    else:
-                        x = (dt - base_time).total_seconds() / 3600  # Hours
-                    
-                    timestamps.append(x)
-                    values.append(float(val))
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Skipping invalid data point ({ts}, {val}): {str(e)}")
-                    
-            if not timestamps or not values:
+            if not len(timestamps) or not len(values):
                 return {
                     "success": False,
                     "error": "No valid data points after parsing",
@@ -110,7 +162,7 @@ class PredictionEngine:
                 seasonal_data = None
                 
             # Fit exponential smoothing if appropriate
-            if all(v > 0 for v in values):
+            if np.all(values > 0):
                 exp_prediction = self._exponential_forecast(values, hours_ahead)
             else:
                 exp_prediction = linear_prediction
@@ -152,7 +204,7 @@ class PredictionEngine:
             result = {
                 "success": True,
                 "metric": metric_name,
-                "current_value": values[-1] if values else None,
+                "current_value": values[-1] if len(values) else None,
                 "current_time": current_time.isoformat(),
                 "forecast_value": ensemble_prediction,
                 "forecast_time": forecast_time.isoformat(),
@@ -164,7 +216,7 @@ class PredictionEngine:
                 "trend": {
                     "direction": "increasing" if linear_coef > 0 else "decreasing" if linear_coef < 0 else "stable",
                     "slope": linear_coef,
-                    "percent_change_per_day": linear_coef * 24 / values[-1] * 100 if values and values[-1] != 0 else 0
+                    "percent_change_per_day": linear_coef * 24 / values[-1] * 100 if len(values) and values[-1] != 0 else 0
                 }
             }
             
@@ -177,31 +229,94 @@ class PredictionEngine:
                 "metric": metric_name
             }
             
-    def _linear_forecast(self, x: List[float], y: List[float], 
+    def _parse_history(self, history: List[Tuple[str, float]],
+                       warn: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Parse (timestamp, value) rows into datetime64[us] and float64 arrays"""
+        if not history:
+            return np.empty(0, dtype="datetime64[us]"), np.empty(0, dtype=np.float64)
+            
+        ts_list, val_list = zip(*history)
+        
+        # Fast path: NumPy parses ISO and legacy 'YYYY-MM-DD HH:MM:SS' strings in C.
+        # It is more lenient than the row parser (date-only strings, fractional
+        # seconds on legacy strings, None values as NaN), so only the shapes the
+        # row parser accepts on every Python are taken: legacy strings of exactly
+        # 19 characters, and ISO strings with no, milli- or microsecond fractions
+        try:
+            raw = np.array(ts_list)
+            if raw.dtype.kind == "U" and None not in val_list:
+                lengths = np.char.str_len(raw)
+                is_iso = np.char.find(raw, "T") >= 0
+                shapes_ok = np.where(is_iso, np.isin(lengths, (19, 23, 26)), lengths == 19).all()
+            else:
+                shapes_ok = False
+            if shapes_ok:
+                with warnings.catch_warnings():
+                    # Timezone offsets only parse with a warning (UserWarning, or
+                    # DeprecationWarning on NumPy 1.x); leave them to the slow path
+                    warnings.simplefilter("error")
+                    times = raw.astype("datetime64[us]")
+                values = np.array(val_list, dtype=np.float64)
+                if not np.isnat(times).any():
+                    return times, values
+        except (ValueError, TypeError, Warning):
+            pass
+            
+        # Slow path: parse row by row into preallocated arrays, skipping invalid rows
+        n = len(history)
+        times = np.empty(n, dtype="datetime64[us]")
+        values = np.empty(n, dtype=np.float64)
+        write_idx = 0
+        for ts, val in history:
+            try:
+                if 'T' in ts:  # ISO format
+                    dt = datetime.fromisoformat(ts)
+                else:  # Legacy format
+                    dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
+                value = float(val)
+            except (ValueError, TypeError) as e:
+                if warn:
+                    logger.warning(f"Skipping invalid data point ({ts}, {val}): {str(e)}")
+                continue
+            times[write_idx] = dt.replace(tzinfo=None)
+            values[write_idx] = value
+            write_idx += 1
+            
+        return times[:write_idx], values[:write_idx]
+        
+    def _hours_since_start(self, times: np.ndarray) -> np.ndarray:
+        """Hours elapsed since the first timestamp"""
+        if not len(times):
+            return np.empty(0, dtype=np.float64)
+        # Same arithmetic as timedelta.total_seconds() / 3600
+        return (times - times[0]).astype(np.int64) / 1e6 / 3600
+            
+    def _linear_forecast(self, x: Union[List[float], np.ndarray], y: Union[List[float], np.ndarray], 
                        hours_ahead: int) -> Tuple[float, float, float]:
         """Fit linear model and forecast ahead"""
-        if not x or not y or len(x) < 2 or len(y) < 2:
+        if len(x) < 2 or len(y) < 2:
             # Default to last value and no slope
-            return y[-1] if y else 0, 0, y[-1] if y else 0
+            return y[-1] if len(y) else 0, 0, y[-1] if len(y) else 0
             
-        # Linear regression
-        x_arr = np.array(x)
-        y_arr = np.array(y)
+        # Linear regression over the paired points
+        n = min(len(x), len(y))
+        x_arr = np.asarray(x[:n], dtype=np.float64)
+        y_arr = np.asarray(y[:n], dtype=np.float64)
         
         # Calculate coefficients
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x_i * y_i for x_i, y_i in zip(x, y))
-        sum_xx = sum(x_i * x_i for x_i in x)
+        sum_x = float(x_arr.sum())
+        sum_y = float(y_arr.sum())
+        sum_xy = float(x_arr @ y_arr)
+        sum_xx = float(x_arr @ x_arr)
         
         # Calculate slope and intercept
-        try:
-            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
-            intercept = (sum_y - slope * sum_x) / n
-        except ZeroDivisionError:
+        denominator = n * sum_xx - sum_x * sum_x
+        if np.isclose(denominator, 0.0):
             slope = 0
-            intercept = np.mean(y_arr)
+            intercept = float(y_arr.mean())
+        else:
+            slope = (n * sum_xy - sum_x * sum_y) / denominator
+            intercept = (sum_y - slope * sum_x) / n
             
         # Forecast
         forecast_x = x[-1] + hours_ahead
@@ -209,40 +324,16 @@ class PredictionEngine:
         
         return forecast_y, slope, intercept
             
-    def _seasonal_forecast(self, x: List[float], y: List[float], 
+    def _seasonal_forecast(self, x: Union[List[float], np.ndarray], y: Union[List[float], np.ndarray], 
                          hours_ahead: int) -> Tuple[float, Dict[str, Any]]:
         """Fit a basic seasonal model and forecast ahead"""
         # Estimate seasonality if sufficient data
         if len(y) < 48:  # Need at least 2 days for daily seasonality
             return y[-1], {"error": "Insufficient data for seasonality"}
             
-        # Assume 24-hour cycle and calculate average pattern
         hours_in_day = 24
+        hourly_ratios = self._seasonal_ratios(x, y)
         
-        # Group values by hour of day
-        hour_groups = {}
-        last_complete_day = {}
-        
-        for i, (timestamp, value) in enumerate(zip(x, y)):
-            hour = int(timestamp) % hours_in_day
-            if hour not in hour_groups:
-                hour_groups[hour] = []
-            hour_groups[hour].append(value)
-            last_complete_day[hour] = value
-            
-        # Calculate average for each hour
-        hourly_averages = {}
-        for hour, values in hour_groups.items():
-            hourly_averages[hour] = sum(values) / len(values)
-            
-        # Calculate overall average
-        overall_avg = sum(y) / len(y)
-        
-        # Calculate hourly ratios
-        hourly_ratios = {}
-        for hour, avg in hourly_averages.items():
-            hourly_ratios[hour] = avg / overall_avg if overall_avg != 0 else 1.0
-            
         # Determine which hour of the day we'll be at
         current_hour = int(x[-1]) % hours_in_day
         forecast_hour = (current_hour + hours_ahead) % hours_in_day
@@ -266,62 +357,57 @@ class PredictionEngine:
         
         return seasonal_forecast, seasonal_data
             
-    def _exponential_forecast(self, y: List[float], hours_ahead: int) -> float:
+    def _seasonal_ratios(self, x: Union[List[float], np.ndarray],
+                         y: Union[List[float], np.ndarray]) -> Dict[int, float]:
+        """Ratio of each hour of day's average to the overall average"""
+        # Assume 24-hour cycle and calculate average pattern
+        hours_in_day = 24
+        x_arr = np.asarray(x, dtype=np.float64)
+        y_arr = np.asarray(y, dtype=np.float64)
+        n = min(len(x_arr), len(y_arr))
+        
+        # Group values by hour of day (truncating like int() does)
+        hours = x_arr[:n].astype(np.intp) % hours_in_day
+        counts = np.bincount(hours, minlength=hours_in_day)
+        sums = np.bincount(hours, weights=y_arr[:n], minlength=hours_in_day)
+        
+        # Calculate overall average
+        overall_avg = float(y_arr.mean())
+        
+        # Calculate hourly ratios
+        hourly_ratios = {}
+        for hour in np.flatnonzero(counts).tolist():
+            avg = sums[hour] / counts[hour]
+            hourly_ratios[hour] = float(avg / overall_avg) if overall_avg != 0 else 1.0
+            
+        return hourly_ratios
+        
+    def _exponential_forecast(self, y: Union[List[float], np.ndarray], hours_ahead: int) -> float:
         """Simple exponential smoothing forecast"""
-        if not y:
+        if not len(y):
             return 0
             
         # Use only positive values for exponential smoothing
-        y_filtered = [v for v in y if v > 0]
-        if not y_filtered:
+        y_arr = np.asarray(y, dtype=np.float64)
+        y_filtered = y_arr[y_arr > 0]
+        if not len(y_filtered):
             return y[-1]  # Last value
             
-        # Determine best alpha using hold-out validation
-        alphas = [0.1, 0.2, 0.3, 0.5, 0.7, 0.9]
-        best_alpha = 0.3  # Default
-        best_error = float('inf')
-        
-        # Split data for validation
+        if numba is None:
+            # Python floats loop faster than NumPy scalars in the interpreted kernel
+            y_filtered = y_filtered.tolist()
+            
+        # Determine best alpha using hold-out validation, then smooth the series
         train_size = int(len(y_filtered) * 0.8)
-        if train_size >= 10:  # Only validate if we have enough data
-            train = y_filtered[:train_size]
-            test = y_filtered[train_size:]
-            
-            for alpha in alphas:
-                # Initialize forecast with first value
-                forecast = train[0]
-                # Generate one-step-ahead forecasts
-                forecasts = []
-                for val in train[1:]:
-                    forecast = alpha * val + (1 - alpha) * forecast
-                    forecasts.append(forecast)
-                    
-                # Continue for test set without updating
-                for _ in range(len(test)):
-                    forecast = forecast  # No update, just propagate
-                    forecasts.append(forecast)
-                    
-                # Calculate error on test set
-                errors = [(f - a)**2 for f, a in zip(forecasts[-len(test):], test)]
-                mse = sum(errors) / len(errors) if errors else float('inf')
-                
-                if mse < best_error:
-                    best_error = mse
-                    best_alpha = alpha
-        
-        # Apply exponential smoothing with best alpha
-        alpha = best_alpha
-        forecast = y_filtered[0]
-        for val in y_filtered[1:]:
-            forecast = alpha * val + (1 - alpha) * forecast
+        _, forecast = _es_grid_search(y_filtered, train_size, _ES_ALPHAS)
             
         # Project forward
         # No update for future values, so the forecast remains the same
         # This is appropriate for exponential smoothing without trend or seasonality
         
-        return forecast
+        return float(forecast)
             
-    def _ensemble_forecast(self, x: List[float], y: List[float], hours_ahead: int,
+    def _ensemble_forecast(self, x: Union[List[float], np.ndarray], y: Union[List[float], np.ndarray], hours_ahead: int,
                         linear_pred: float, seasonal_pred: float, exp_pred: float) -> Tuple[float, Dict[str, float]]:
         """Create an ensemble prediction using validation to determine weights"""
         # Default weights
@@ -347,17 +433,32 @@ class PredictionEngine:
                     # Generate forecasts for validation set
                     val_errors = {"linear": 0, "seasonal": 0, "exponential": 0}
                     
+                    # Neither fit depends on the horizon, so fit once: the linear
+                    # forecast just extends the line and exponential smoothing is flat
+                    _, slope, intercept = self._linear_forecast(train_x, train_y, 0)
+                    last_x = train_x[-1]
+                    use_exponential = bool(np.all(np.asarray(train_y) > 0))
+                    if use_exponential:
+                        exp_level = self._exponential_forecast(train_y, 0)
+                        
+                    # Likewise the seasonal model only looks up the hour-of-day
+                    # ratio for the horizon, so compute the ratios once
+                    use_seasonal = len(train_y) >= 72
+                    if use_seasonal:
+                        hourly_ratios = self._seasonal_ratios(train_x, train_y)
+                        current_hour = int(last_x) % 24
+                    
                     for i, ahead in enumerate(range(len(val_x))):
                         # Calculate forecasts
-                        linear_val, _, _ = self._linear_forecast(train_x, train_y, ahead)
+                        linear_val = slope * (last_x + ahead) + intercept
                         
-                        if len(train_y) >= 72:
-                            seasonal_val, _ = self._seasonal_forecast(train_x, train_y, ahead)
+                        if use_seasonal:
+                            seasonal_val = linear_val * hourly_ratios.get((current_hour + ahead) % 24, 1.0)
                         else:
                             seasonal_val = linear_val
                             
-                        if all(v > 0 for v in train_y):
-                            exp_val = self._exponential_forecast(train_y, ahead)
+                        if use_exponential:
+                            exp_val = exp_level
                         else:
                             exp_val = linear_val
                             
@@ -408,7 +509,7 @@ class PredictionEngine:
         """Detect recurring patterns in a metric"""
         try:
             # Get historical data
-            history = self.memory.get_metric_history(metric_name, days=days)
+            history = self._get_metric_history(metric_name, days)
             
             if not history or len(history) < 24:
                 return {
@@ -418,22 +519,9 @@ class PredictionEngine:
                 }
                 
             # Extract timestamps and values
-            timestamps = []
-            values = []
-            
-            for ts, val in history:
-                try:
-                    if 'T' in ts:  # ISO format
-                        dt = datetime.fromisoformat(ts)
-                    else:
-                        dt = datetime.strptime(ts, '%Y-%m-%d %H:%M:%S')
-                        
-                    timestamps.append(dt)
-                    values.append(float(val))
-                except (ValueError, TypeError):
-                    continue
+            timestamps, values = self._parse_history(history)
                     
-            if not timestamps or not values:
+            if not len(timestamps) or not len(values):
                 return {
                     "success": False,
                     "error": "No valid data points after parsing",
@@ -468,30 +556,15 @@ class PredictionEngine:
                 "metric": metric_name
             }
             
-    def _analyze_daily_patterns(self, timestamps: List[datetime], 
-                               values: List[float]) -> Dict[str, Any]:
+    def _analyze_daily_patterns(self, timestamps: np.ndarray, 
+                               values: np.ndarray) -> Dict[str, Any]:
         """Analyze patterns by hour of day"""
-        if not timestamps or not values or len(timestamps) < 24:
+        if not len(values) or len(timestamps) < 24:
             return {"detected": False, "reason": "Insufficient data"}
             
-        # Group by hour of day
-        hourly_data = {}
-        for dt, val in zip(timestamps, values):
-            hour = dt.hour
-            if hour not in hourly_data:
-                hourly_data[hour] = []
-            hourly_data[hour].append(val)
-            
-        # Calculate statistics for each hour
-        hourly_stats = {}
-        for hour, vals in hourly_data.items():
-            if vals:
-                hourly_stats[hour] = {
-                    "mean": sum(vals) / len(vals),
-                    "min": min(vals),
-                    "max": max(vals),
-                    "count": len(vals)
-                }
+        # Group by hour of day and calculate statistics for each hour
+        hours = (timestamps.astype("datetime64[h]").astype(np.int64) % 24).astype(np.intp)
+        hourly_stats = self._group_stats(hours, values, 24)
                 
         # Find peak and trough hours
         if hourly_stats:
@@ -500,7 +573,7 @@ class PredictionEngine:
             trough_hour = min(mean_values, key=lambda x: x[1])[0]
             
             # Calculate variability
-            overall_mean = sum(values) / len(values)
+            overall_mean = float(np.mean(values))
             peak_ratio = hourly_stats[peak_hour]["mean"] / overall_mean if overall_mean else 1
             trough_ratio = hourly_stats[trough_hour]["mean"] / overall_mean if overall_mean else 1
             
@@ -520,38 +593,25 @@ class PredictionEngine:
         else:
             return {"detected": False, "reason": "Could not analyze hourly data"}
             
-    def _analyze_weekly_patterns(self, timestamps: List[datetime], 
-                               values: List[float]) -> Dict[str, Any]:
+    def _analyze_weekly_patterns(self, timestamps: np.ndarray, 
+                               values: np.ndarray) -> Dict[str, Any]:
         """Analyze patterns by day of week"""
-        if not timestamps or not values or len(timestamps) < 7 * 24:  # At least a week
+        if not len(values) or len(timestamps) < 7 * 24:  # At least a week
             return {"detected": False, "reason": "Need at least a week of data"}
             
         # Group by day of week
-        daily_data = {}
         days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         
-        for dt, val in zip(timestamps, values):
-            day_idx = dt.weekday()  # 0 = Monday, 6 = Sunday
-            day_name = days[day_idx]
-            
-            if day_name not in daily_data:
-                daily_data[day_name] = []
-            daily_data[day_name].append(val)
+        # 1970-01-01 was a Thursday (weekday 3); 0 = Monday
+        day_idx = ((timestamps.astype("datetime64[D]").astype(np.int64) + 3) % 7).astype(np.intp)
+        day_stats = self._group_stats(day_idx, values, 7)
             
         # Check if we have data for all days
-        if len(daily_data) < 7:
+        if len(day_stats) < 7:
             return {"detected": False, "reason": "Incomplete weekly data"}
             
-        # Calculate statistics for each day
-        daily_stats = {}
-        for day, vals in daily_data.items():
-            if vals:
-                daily_stats[day] = {
-                    "mean": sum(vals) / len(vals),
-                    "min": min(vals),
-                    "max": max(vals),
-                    "count": len(vals)
-                }
+        # Statistics for each day, keyed by day name
+        daily_stats = {days[idx]: stats for idx, stats in day_stats.items()}
                 
         # Find peak and trough days
         if daily_stats:
@@ -560,7 +620,7 @@ class PredictionEngine:
             trough_day = min(mean_values, key=lambda x: x[1])[0]
             
             # Calculate variability
-            overall_mean = sum(values) / len(values)
+            overall_mean = float(np.mean(values))
             peak_ratio = daily_stats[peak_day]["mean"] / overall_mean if overall_mean else 1
             trough_ratio = daily_stats[trough_day]["mean"] / overall_mean if overall_mean else 1
             
@@ -599,23 +659,49 @@ class PredictionEngine:
         else:
             return {"detected": False, "reason": "Could not analyze daily data"}
             
-    def _analyze_trends(self, timestamps: List[datetime], 
-                      values: List[float]) -> Dict[str, Any]:
+    def _group_stats(self, groups: np.ndarray, values: np.ndarray,
+                     size: int) -> Dict[int, Dict[str, Any]]:
+        """Mean/min/max/count of values for each integer group label in [0, size)"""
+        counts = np.bincount(groups, minlength=size)
+        sums = np.bincount(groups, weights=values, minlength=size)
+        
+        # Sort values by group once; each group is then a contiguous run
+        present = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[present]
+        sorted_values = values[np.argsort(groups, kind="stable")]
+        mins = np.minimum.reduceat(sorted_values, starts)
+        maxs = np.maximum.reduceat(sorted_values, starts)
+        
+        # Keep groups in order of first appearance, like grouping into a dict did
+        _, first_seen = np.unique(groups, return_index=True)
+        stats = {}
+        for i in np.argsort(first_seen, kind="stable"):
+            group = int(present[i])
+            stats[group] = {
+                "mean": float(sums[group] / counts[group]),
+                "min": float(mins[i]),
+                "max": float(maxs[i]),
+                "count": int(counts[group])
+            }
+        return stats
+        
+    def _analyze_trends(self, timestamps: np.ndarray, 
+                      values: np.ndarray) -> Dict[str, Any]:
         """Analyze overall trends in the data"""
-        if not timestamps or not values or len(timestamps) < 2:
+        if not len(values) or len(timestamps) < 2:
             return {"detected": False, "reason": "Insufficient data"}
             
         # Convert timestamps to hours since start for regression
-        t0 = timestamps[0]
-        x = [(dt - t0).total_seconds() / 3600 for dt in timestamps]  # Hours
+        x = self._hours_since_start(timestamps)
         y = values
         
         # Linear regression
         _, slope, intercept = self._linear_forecast(x, y, 0)
         
         # Calculate percent change per day
-        if values[0] != 0:
-            percent_change_per_day = (slope * 24) / values[0] * 100
+        first_value = float(values[0])
+        if first_value != 0:
+            percent_change_per_day = (slope * 24) / first_value * 100
         else:
             percent_change_per_day = 0
             
@@ -624,8 +710,8 @@ class PredictionEngine:
         
         # Calculate volatility
         if len(values) > 1:
-            mean = sum(values) / len(values)
-            variance = sum((v - mean) ** 2 for v in values) / len(values)
+            mean = float(np.mean(values))
+            variance = float(np.mean((values - mean) ** 2))
             std_dev = math.sqrt(variance)
             volatility = std_dev / mean if mean != 0 else 0
         else:
@@ -676,90 +762,80 @@ class PredictionEngine:
             
             # Define the next 7 days in hourly increments
             now = datetime.now()
-            schedule = []
-            
-            for day in range(7):
-                for hour in range(24):
-                    timestamp = now + timedelta(days=day, hours=hour)
-                    time_slot = {
-                        "timestamp": timestamp.isoformat(),
-                        "day": timestamp.strftime("%A"),
-                        "hour": hour,
-                        "forecasts": {},
-                        "score": 0,
-                        "activities": []
-                    }
-                    
-                    # Get forecasts for this time
-                    for metric, metric_predictions in predictions.items():
-                        if "forecast_value" in metric_predictions:
-                            time_slot["forecasts"][metric] = metric_predictions["forecast_value"]
-                            
-                    # Calculate score for this time slot
-                    # Higher is better for scheduling
-                    score = 0
-                    
-                    if "cpu_load" in time_slot["forecasts"]:
-                        # Lower CPU load is better
-                        cpu_score = 100 - min(100, time_slot["forecasts"]["cpu_load"] * 100)
-                        score += cpu_score
-                        
-                    if "memory_free_mb" in time_slot["forecasts"]:
-                        # Higher free memory is better
-                        memory_score = min(100, time_slot["forecasts"]["memory_free_mb"] / 10)
-                        score += memory_score
-                        
-                    if "disk_usage_root" in time_slot["forecasts"]:
-                        # Lower disk usage is better
-                        disk_score = 100 - min(100, time_slot["forecasts"]["disk_usage_root"])
-                        score += disk_score
-                        
-                    # Adjust for time of day preferences
-                    # Prefer non-business hours (nights and weekends)
-                    if hour < 7 or hour >= 19:  # Night hours
-                        score += 50
-                    elif timestamp.weekday() >= 5:  # Weekend
-                        score += 25
-                        
-                    time_slot["score"] = score
-                    schedule.append(time_slot)
-                    
-            # Sort schedule by score (highest first)
-            schedule.sort(key=lambda x: x["score"], reverse=True)
+            days = np.repeat(np.arange(7), 24)
+            hours = np.tile(np.arange(24), 7)
+            
+            # The forecasts are single values, so they are the same for every slot
+            forecasts = {
+                metric: metric_predictions["forecast_value"]
+                for metric, metric_predictions in predictions.items()
+                if "forecast_value" in metric_predictions
+            }
+            
+            # Calculate the metric part of the score once
+            # Higher is better for scheduling
+            base_score = 0
+            
+            if "cpu_load" in forecasts:
+                # Lower CPU load is better
+                base_score += 100 - min(100, forecasts["cpu_load"] * 100)
+                
+            if "memory_free_mb" in forecasts:
+                # Higher free memory is better
+                base_score += min(100, forecasts["memory_free_mb"] / 10)
+                
+            if "disk_usage_root" in forecasts:
+                # Lower disk usage is better
+                base_score += 100 - min(100, forecasts["disk_usage_root"])
+                
+            # Adjust for time of day preferences
+            # Prefer non-business hours (nights and weekends)
+            offsets = (days * 24 + hours).astype("timedelta64[h]")
+            slot_days = (np.datetime64(now, "us") + offsets).astype("datetime64[D]").astype(np.int64)
+            weekdays = (slot_days + 3) % 7  # 1970-01-01 was a Thursday
+            bonus = np.where((hours < 7) | (hours >= 19), 50, np.where(weekdays >= 5, 25, 0))
+            scores = base_score + bonus
+            
+            # Slot indices by score (highest first, ties in time order)
+            order = np.argsort(-scores, kind="stable")
             
             # Assign activities to slots
-            scheduled_activities = {}
+            slot_activities = {}
             
             for activity_name, activity_info in activities.items():
+                metric = activity_info["metric"]
+                
+                if metric == "combined":
+                    # For combined metrics, use slots with highest scores
+                    candidates = order[scores[order] > 200]  # Arbitrary threshold
+                elif metric in forecasts and (
+                        (metric == "cpu_load" and forecasts[metric] < 0.5) or
+                        (metric == "memory_free_mb" and forecasts[metric] < 500) or
+                        (metric == "disk_usage_root" and forecasts[metric] > 70)):
+                    # The metric value is appropriate for this activity in every slot
+                    candidates = order
+                else:
+                    continue
+                    
                 # Find the best slot that doesn't have an activity yet
-                for slot in schedule:
-                    if not slot["activities"] and activity_name not in scheduled_activities:
-                        # Check if this slot meets specific metric requirements
-                        metric = activity_info["metric"]
+                for slot_idx in candidates.tolist():
+                    if slot_idx not in slot_activities:
+                        slot_activities[slot_idx] = [activity_name]
+                        break
                         
-                        if metric == "combined":
-                            # For combined metrics, use slots with highest scores
-                            if slot["score"] > 200:  # Arbitrary threshold
-                                slot["activities"].append(activity_name)
-                                scheduled_activities[activity_name] = slot["timestamp"]
-                                break
-                        elif metric in slot["forecasts"]:
-                            # Check if metric value is appropriate for this activity
-                            if metric == "cpu_load" and slot["forecasts"][metric] < 0.5:
-                                slot["activities"].append(activity_name)
-                                scheduled_activities[activity_name] = slot["timestamp"]
-                                break
-                            elif metric == "memory_free_mb" and slot["forecasts"][metric] < 500:
-                                slot["activities"].append(activity_name)
-                                scheduled_activities[activity_name] = slot["timestamp"]
-                                break
-                            elif metric == "disk_usage_root" and slot["forecasts"][metric] > 70:
-                                slot["activities"].append(activity_name)
-                                scheduled_activities[activity_name] = slot["timestamp"]
-                                break
-                                
-            # Filter schedule to only include slots with activities
-            active_schedule = [slot for slot in schedule if slot["activities"]]
+            # Only build the slots that received an activity, in score order
+            active_schedule = []
+            for slot_idx in sorted(slot_activities, key=lambda idx: (-scores[idx], idx)):
+                day, hour = int(days[slot_idx]), int(hours[slot_idx])
+                timestamp = now + timedelta(days=day, hours=hour)
+                active_schedule.append({
+                    "timestamp": timestamp.isoformat(),
+                    "day": timestamp.strftime("%A"),
+                    "hour": hour,
+                    "forecasts": dict(forecasts),
+                    "score": base_score + int(bonus[slot_idx]),
+                    "activities": slot_activities[slot_idx]
+                })
             
             return {
                 "success": True,